@@ -0,0 +1,183 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.models import State, Item
+from models.database import Database
+from utils.ai_client import VoyageEmbeddingModel
+from utils.minhash import LSHIndex, signature, band_keys, from_bytes
+from utils.fingerprint import normalize_url
+from utils.token_budget import truncate_to_tokens
+from utils.vector_index import VectorIndex
+from config import Config
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+import logging
+import numpy as np
+
+# Embeddings of recently stored items, keyed by normalized URL; built on first use
+_novelty_index = None
+# Normalized URL -> (embedding, timestamp) of items kept by this run's semantic dedup, added to
+# _novelty_index by index_saved_items once they are stored; items dropped later never enter it
+_pending_novelty = {}
+
+
+
+def is_near_duplicate(kind: str, entry, match: tuple, urls: dict, current: set) -> bool:
+    """Whether a similar indexed entry should make this item or post redundant"""
+    match_kind = match[0]
+    if kind == "item" and match_kind == "post":
+        # Items are the canonical form of an announcement; posts never displace them
+        return False
+    if kind == "item" and match not in current and normalize_url(urls[match]) == normalize_url(entry.url):
+        # A stored earlier version of the same page is an update, handled by fingerprint reuse
+        return False
+    return True
+
+def remove_near_duplicates(state: State, db: Database) -> State:
+    """
+    Drop crawled items and posts whose MinHash similarity to stored content, or to an earlier
+    entry of this run, reaches Config.NEAR_DUPLICATE_THRESHOLD. Items are compared with items;
+    posts with posts and items. Kept entries carry their signature so it is saved with the row.
+    Entries too short to sign are kept unindexed with minhash None.
+    """
+    try:
+        entries = [("item", item) for item in state.items] + [("post", post) for post in state.posts]
+        signatures = [signature(entry.content_snippet) for _, entry in entries]
+        keys = [band_keys(sig) if sig is not None else [] for sig in signatures]
+
+        # Stored rows sharing a band with anything new, fetched through the band index in one pass
+        index, urls, current = LSHIndex(), {}, set()
+        stored_kinds = ["item", "post"] if state.posts else ["item"]
+        for kind, row_id, stored_signature, url in db.get_near_duplicate_candidates(
+            (key for entry_keys in keys for key in entry_keys), stored_kinds
+        ):
+            index.add((kind, row_id), from_bytes(stored_signature))
+            urls[(kind, row_id)] = url
+
+        kept = {"item": [], "post": []}
+        dropped = Counter()
+        for (kind, entry), sig, entry_keys in zip(entries, signatures, keys):
+            if sig is None:
+                entry.minhash = None
+                kept[kind].append(entry)
+                continue
+            matches = [
+                match for match in index.query(sig, entry_keys)
+                if is_near_duplicate(kind, entry, match, urls, current)
+            ]
+            if matches:
+                dropped[kind] += 1
+                logging.info(f"Dropping near-duplicate {kind} {entry.id}, similar to {matches[0][0]} {matches[0][1]}")
+                continue
+            entry.minhash = sig.tobytes()
+            kept[kind].append(entry)
+            key = (kind, entry.id)
+            index.add(key, sig, entry_keys)
+            urls[key] = getattr(entry, "url", None)
+            current.add(key)
+
+        state.items, state.posts = kept["item"], kept["post"]
+        logging.info(f"Removed {dropped['item']} near-duplicate items and {dropped['post']} near-duplicate posts")
+        return state
+    except Exception as e:
+        logging.error(f"Error removing near-duplicates: {e}")
+        raise
+
+def novelty_text(item: Item) -> str:
+    """Title plus the head of the abstract or README, the part that identifies what an item announces"""
+    return truncate_to_tokens(f"{item.title or ''}\n{item.content_snippet}", Config.NOVELTY_TEXT_TOKENS)
+
+def get_novelty_index(db: Database, embedding_model: VoyageEmbeddingModel) -> VectorIndex:
+    """Index of the last NOVELTY_DAYS of stored items, loaded once and then kept current in memory"""
+    global _novelty_index
+    if _novelty_index is None:
+        index = VectorIndex()
+        recent = db.get_recent_items(days=Config.NOVELTY_DAYS)
+        if recent:
+            # Stored items were embedded on earlier runs, so this is mostly served by the embedding cache
+            index.add(
+                [normalize_url(item.url) for item in recent],
+                embedding_model.encode([novelty_text(item) for item in recent]),
+                [item.timestamp.timestamp() for item in recent]
+            )
+        logging.info(f"Loaded novelty index with {len(index)} items from the last {Config.NOVELTY_DAYS} days")
+        _novelty_index = index
+    _novelty_index.expire((datetime.now() - timedelta(days=Config.NOVELTY_DAYS)).timestamp())
+    return _novelty_index
+
+def remove_semantic_duplicates(state: State, db: Database, embedding_model: VoyageEmbeddingModel = None) -> State:
+    """
+    Drop items whose title and abstract embed within SEMANTIC_DUPLICATE_THRESHOLD cosine similarity
+    of an item stored in the last NOVELTY_DAYS, or of an item kept earlier in this run. A stored
+    item with the same URL is an earlier version of the page, not a duplicate.
+    """
+    if not state.items:
+        return state
+    try:
+        embedding_model = embedding_model or VoyageEmbeddingModel()
+        index = get_novelty_index(db, embedding_model)
+        vectors = embedding_model.encode([novelty_text(item) for item in state.items])
+    except Exception as e:
+        # Dedup only saves work, so an embedding outage must not stop the run
+        logging.error(f"Skipping semantic dedup: {e}")
+        return state
+
+    threshold = Config.SEMANTIC_DUPLICATE_THRESHOLD
+    scores, matches = index.search_top_k(vectors, Config.NOVELTY_TOP_K)
+    run_index = VectorIndex()
+    kept = []
+    _pending_novelty.clear()
+    for row, item in enumerate(state.items):
+        url = normalize_url(item.url)
+        duplicate = first_duplicate(scores[row], matches[row], url, threshold)
+        if duplicate:
+            logging.info(f"Dropping {item.url}: {duplicate[0]:.3f} similar to stored item {duplicate[1]}")
+            continue
+        if len(run_index):
+            run_scores, run_matches = run_index.search_top_k(vectors[row:row + 1], Config.NOVELTY_TOP_K)
+            duplicate = first_duplicate(run_scores[0], run_matches[0], url, threshold)
+            if duplicate:
+                logging.info(f"Dropping {item.url}: {duplicate[0]:.3f} similar to {duplicate[1]} from this run")
+                continue
+        run_index.add([url], vectors[row:row + 1], [0.0])
+        kept.append(item)
+        _pending_novelty[url] = (vectors[row], item.timestamp.timestamp() if item.timestamp else datetime.now().timestamp())
+
+    logging.info(f"Removed {len(state.items) - len(kept)} semantically duplicate items")
+    state.items = kept
+    return state
+
+def first_duplicate(scores, matches, url: str, threshold: float) -> Optional[Tuple[float, str]]:
+    """Best (score, key) at or above the threshold among one item's neighbours, skipping its own URL"""
+    for score, match in zip(scores, matches):
+        if score < threshold:
+            return None
+        if match is not None and match != url:
+            return float(score), match
+    return None
+
+def index_saved_items(items: List[Item]):
+    """Add the embeddings of items that were kept by semantic dedup and have now been saved to _novelty_index"""
+    urls = dict.fromkeys(normalize_url(item.url) for item in items)
+    saved = [(url, *_pending_novelty[url]) for url in urls if url in _pending_novelty]
+    if _novelty_index is not None and saved:
+        urls, vectors, times = zip(*saved)
+        _novelty_index.add(list(urls), np.stack(vectors), list(times))
+        logging.info(f"Added {len(saved)} saved items to the novelty index")
+    _pending_novelty.clear()
+
+def deduplicate(state: State) -> State:
+    try:
+        db = Database()
+        # Cheap lexical check first, so fewer items need embedding
+        state = remove_near_duplicates(state, db)
+        return remove_semantic_duplicates(state, db)
+    except Exception as e:
+        logging.error(f"Deduplication failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    state = State()
+    state = deduplicate(state)
+    print(state)
@@ -1,31 +1,36 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from models.models import State, DBPost
+from models.models import State
 from models.database import Database
+from utils.fingerprint import text_hash
+from config import Config
 import logging
 from datetime import datetime, timedelta
 
 
 
 def filter_duplicates_posts(state: State, db: Database) -> State:
-    """Filter out duplicate posts"""
+    """Filter out posts already stored (or repeated within this run) by content hash"""
     try:
-        count = 0
-        posts_db = db.session.query(DBPost).filter(DBPost.publication_date >= datetime.now().date() - timedelta(days=5)).all()
-        for post in state.posts:
-            for post_db in posts_db:
-                if post.cleaned_text == post_db.cleaned_text:
-                    state.posts.remove(post)
-                    count += 1
-        logging.info(f"Filtered out {count} duplicate posts")
-        old_posts = db.session.query(DBPost).filter(DBPost.publication_date < datetime.now().date() - timedelta(days=5)).all()
-        db.remove_posts(old_posts)
+        # Expire posts past the retention window first, so the hash index only holds posts still in it
+        cutoff = datetime.combine(datetime.now().date() - timedelta(days=Config.POST_RETENTION_DAYS), datetime.min.time())
+        db.remove_posts_before(cutoff)
+
+        unique_posts = {}
         for post in state.posts:
-            db.save_post(post)
+            post.content_hash = text_hash(post.cleaned_text or post.content_snippet)
+            unique_posts.setdefault(post.content_hash, post)
+        stored = db.get_existing_post_hashes(list(unique_posts))
+        new_posts = [post for content_hash, post in unique_posts.items() if content_hash not in stored]
+        logging.info(f"Filtered out {len(state.posts) - len(new_posts)} duplicate posts")
+        state.posts = new_posts
+
+        db.save_posts(state.posts)
         return state
     except Exception as e:
         logging.error(f"Error filtering duplicate posts: {e}")
+        raise
 
 def filter_incomplete_items(state: State) -> State:
     """Filter out items that are missing required fields (title, news_snippet, or URL)"""
@@ -63,23 +68,19 @@ def filter_trash(state: State) -> State:
 
 def filter_output(state: State) -> State:
     try:
-        # Initialize database connection
         db = Database()
+
+        logging.info("Filtering data")
+        # First filter out incomplete items
+        state = filter_incomplete_items(state)
+     
+        # Then filter out trash items
+        state = filter_trash(state)
         
-        try:
-            logging.info("Filtering data")
-            # First filter out incomplete items
-            state = filter_incomplete_items(state)
-         
-            # Then filter out trash items
-            state = filter_trash(state)
-            
-            # Then filter out duplicate posts
-            state = filter_duplicates_posts(state, db)
-            logging.info("Data filtered")
-            return state
-        finally:
-            db.session.close()
+        # Then filter out duplicate posts
+        state = filter_duplicates_posts(state, db)
+        logging.info("Data filtered")
+        return state
     except Exception as e:
         logging.error(f"Output presentation failed: {e}")
         raise
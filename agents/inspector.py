@@ -1,78 +1,244 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from prompts import INSPECTION_PROMPT
-from utils.ai_client import AIClient
+from prompts import INSPECTION_PROMPT, BATCH_INSPECTION_PROMPT, BATCH_INSPECTION_ITEM
+from utils.ai_client import AIClient, json_response_format
+from utils.http_clients import run_async
+from utils.token_budget import budget_text, count_tokens
 from models.models import State, Item
+from models.database import Database
+from utils.tags import normalize_tag
+from config import Config
+import hashlib
 import logging
-import asyncio
 import json
+from collections import Counter
+from typing import List, Set, Tuple, Dict, Union, Optional
 
+VERDICT_FIELDS = ("title_valid", "tags_valid", "summary_valid", "snippet_valid")
+ISSUE_FIELDS = ("title", "tags", "summary", "snippet")
 
+# Strict structured-output schemas: every property required, no extra keys
+VERDICT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        **{field: {"type": "boolean"} for field in VERDICT_FIELDS},
+        "issues": {
+            "type": "object",
+            "properties": {field: {"type": ["string", "null"]} for field in ISSUE_FIELDS},
+            "required": list(ISSUE_FIELDS),
+            "additionalProperties": False
+        }
+    },
+    "required": [*VERDICT_FIELDS, "issues"],
+    "additionalProperties": False
+}
+BATCH_VERDICT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "verdicts": {
+            "type": "array",
+            "items": {
+                **VERDICT_SCHEMA,
+                "properties": {"item_id": {"type": "string"}, **VERDICT_SCHEMA["properties"]},
+                "required": ["item_id", *VERDICT_SCHEMA["required"]]
+            }
+        }
+    },
+    "required": ["verdicts"],
+    "additionalProperties": False
+}
+
+
+
+def output_hash(item: Item) -> str:
+    """Hash of the generated fields an inspection verdict depends on."""
+    outputs = [item.title, item.content_tags, item.summary, item.news_snippet]
+    return hashlib.sha256(json.dumps(outputs, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def stored_passes(items: List[Item]) -> Set[Tuple[str, str]]:
+    """(fingerprint, output hash) pairs of these items whose outputs passed inspection in an earlier run"""
+    keys = [(item.fingerprint, output_hash(item)) for item in items if item.fingerprint]
+    try:
+        return Database().get_passed_inspections(keys) if keys else set()
+    except Exception as e:
+        logging.warning(f"Stored inspection passes unavailable, inspecting every changed item: {e}")
+        return set()
+
+def record_passes(items: List[Item]):
+    """Persist the verdicts of items that passed, so later runs reusing their outputs skip inspection"""
+    keys = [(item.fingerprint, output_hash(item)) for item in items if item.fingerprint]
+    try:
+        Database().save_passed_inspections(keys)
+    except Exception as e:
+        logging.warning(f"Could not store inspection passes: {e}")
 
-async def validate_content(llm: AIClient, item: Item) -> dict:
-    """Validate a single item's content using the LLM."""
+ALLOWED_TAGS = {normalize_tag(tag) for tag in Config.ai_tags} | {"technology"}
+
+def prevalidate(item: Item) -> Tuple[Optional[dict], List[str]]:
+    """
+    Deterministic checks run before the LLM inspector. Returns a verdict when the rules settle
+    the item on their own (a clear failure, or a 'Trash' snippet the filter stage drops anyway),
+    or None when the item has to go to the model, plus the names of the rules that fired.
+    """
+    if item.news_snippet.strip().lower() == "trash":
+        return {**{field: True for field in VERDICT_FIELDS}, "issues": {}}, ["trash_snippet"]
+
+    issues, fired = {}, []
+    # The 10 word limit is a TITLE_PROMPT instruction; crawler titles (e.g. arXiv paper titles) are kept as published
+    if not item.title.strip() or (item.title_generated and len(item.title.split()) > 10):
+        issues["title"] = "Title is empty or longer than 10 words"
+        fired.append("title_length")
+    unknown = [tag for tag in item.content_tags if normalize_tag(tag) not in ALLOWED_TAGS]
+    if not item.content_tags or unknown:
+        issues["tags"] = f"Tags outside the allowed list: {unknown}" if unknown else "No tags"
+        fired.append("unknown_tags")
+    if not item.summary.strip():
+        issues["summary"] = "Summary is empty"
+        fired.append("empty_summary")
+    if not item.news_snippet.strip():
+        issues["snippet"] = "Snippet is empty"
+        fired.append("empty_snippet")
+    elif Config.PREVALIDATION_REQUIRE_URL and item.url not in item.news_snippet:
+        issues["snippet"] = "Snippet does not link the original article"
+        fired.append("snippet_missing_url")
+    if not fired:
+        return None, fired
+    return {
+        "title_valid": "title" not in issues,
+        "tags_valid": "tags" not in issues,
+        "summary_valid": "summary" not in issues,
+        "snippet_valid": "snippet" not in issues,
+        "issues": issues
+    }, fired
+
+def build_inspection_prompt(item: Item) -> str:
+    """Render the inspection prompt for a single item."""
+    return INSPECTION_PROMPT.format(
+        content=budget_text(item.cleaned_text, "inspection"),
+        title=item.title,
+        tags=item.content_tags,
+        summary=item.summary,
+        snippet=item.news_snippet
+    )
+
+def strip_json_fences(response: Optional[str]) -> str:
+    # Refusals in structured output mode come back with no content at all
+    response = (response or "").strip()
+    if response.startswith("```json"):
+        response = response[7:]
+    if response.endswith("```"):
+        response = response[:-3]
+    return response
+
+def validate_verdict(payload) -> Optional[dict]:
+    """Return the verdict with its issues normalised, or None when it does not match VERDICT_SCHEMA."""
+    if not isinstance(payload, dict) or not all(isinstance(payload.get(field), bool) for field in VERDICT_FIELDS):
+        return None
+    issues = payload.get("issues")
+    issues = issues if isinstance(issues, dict) else {}
+    return {
+        **{field: payload[field] for field in VERDICT_FIELDS},
+        "issues": {field: issues.get(field) for field in ISSUE_FIELDS}
+    }
+
+def parse_validation_response(response: str) -> Optional[dict]:
+    """Parse the inspector's JSON verdict; None when it is unparseable or malformed."""
     try:
-        messages = INSPECTION_PROMPT.format(
-            content=item.cleaned_text,
+        verdict = validate_verdict(json.loads(strip_json_fences(response)))
+    except (json.JSONDecodeError, TypeError, AttributeError):
+        verdict = None
+    if verdict is None:
+        logging.error(f"Failed to parse JSON response: {response}")
+    return verdict
+
+def build_batch_prompts(items: List[Item]) -> List[Tuple[List[Item], str]]:
+    """Greedily pack items into batched inspection prompts within the configured item and token limits."""
+    overhead = count_tokens(BATCH_INSPECTION_PROMPT)
+    batches, blocks, tokens = [], [], overhead
+    for item in items:
+        block = BATCH_INSPECTION_ITEM.format(
+            item_id=item.id,
+            content=budget_text(item.cleaned_text, "inspection_batch"),
             title=item.title,
             tags=item.content_tags,
             summary=item.summary,
             snippet=item.news_snippet
         )
-        response = await llm.get_completion(messages)
-        
-        # Clean the response and parse JSON
-        response = response.strip()
-        if response.startswith("```json"):
-            response = response[7:]
-        if response.endswith("```"):
-            response = response[:-3]
-        
-        try:
-            validation_result = json.loads(response)
-        except json.JSONDecodeError as e:
-            logging.error(f"Failed to parse JSON response: {response}")
-            # Return a default validation result indicating failure
-            return {
-                "title_valid": False,
-                "tags_valid": False,
-                "summary_valid": False,
-                "snippet_valid": False,
-                "issues": {
-                    "title": "Failed to validate due to parsing error",
-                    "tags": "Failed to validate due to parsing error",
-                    "summary": "Failed to validate due to parsing error",
-                    "snippet": "Failed to validate due to parsing error"
-                }
-            }
-        
-        return validation_result
-    except Exception as e:
-        logging.error(f"Content validation failed: {e}")
-        raise
+        block_tokens = count_tokens(block)
+        if blocks and (len(blocks) >= Config.INSPECTION_BATCH_MAX_ITEMS or tokens + block_tokens > Config.INSPECTION_BATCH_MAX_TOKENS):
+            batches.append(blocks)
+            blocks, tokens = [], overhead
+        blocks.append((item, block))
+        tokens += block_tokens
+    if blocks:
+        batches.append(blocks)
+    return [
+        ([item for item, _ in batch], BATCH_INSPECTION_PROMPT.format(items="\n".join(block for _, block in batch)))
+        for batch in batches
+    ]
 
-async def reprocess_content(llm: AIClient, item: Item, issues: dict):
-    """Reprocess content based on identified issues."""
+def parse_batch_response(response: str, items: List[Item]) -> Dict[str, dict]:
+    """Map item id -> verdict for every well-formed verdict in a batched response; anything else is left out."""
     try:
-        from agents.process import generate_title, generate_tags
-        from agents.summarize import summarize_and_write
-        
-        if not issues['title_valid']:
-            item.title = generate_title(llm, item.cleaned_text, item.source)
-            
-        if not issues['tags_valid']:
-            item.content_tags = generate_tags(llm, item.cleaned_text, item.source)
-            
-        if not issues['summary_valid'] or not issues['snippet_valid']:
-            temp_state = State(items=[item])
-            temp_state = summarize_and_write(temp_state, llm)
-            item.summary = temp_state.items[0].summary
-            item.news_snippet = temp_state.items[0].news_snippet
-            
-    except Exception as e:
-        logging.error(f"Content reprocessing failed: {e}")
-        raise
+        payload = json.loads(strip_json_fences(response))
+    except (json.JSONDecodeError, TypeError, AttributeError):
+        logging.error(f"Failed to parse batched inspection response: {response}")
+        return {}
+    verdicts = payload.get("verdicts") if isinstance(payload, dict) else payload
+    if not isinstance(verdicts, list):
+        return {}
+    item_ids = {item.id for item in items}
+    results = {}
+    for payload in verdicts:
+        item_id = payload.get("item_id") if isinstance(payload, dict) else None
+        verdict = validate_verdict(payload)
+        if item_id in item_ids and verdict is not None:
+            results[item_id] = verdict
+    return results
+
+def validate_items(llm: AIClient, items: List[Item]) -> List[Union[dict, Exception]]:
+    """
+    Validate items with batched inspection prompts, then inspect one by one every item whose
+    verdict was missing or malformed. Returns a verdict or the exception per item, in order.
+    """
+    verdicts = {}
+    if Config.INSPECTION_BATCH_ENABLED and len(items) > 1:
+        batches = [(batch, prompt) for batch, prompt in build_batch_prompts(items) if len(batch) > 1]
+        responses = run_async(llm.get_completions_many(
+            [prompt for _, prompt in batches],
+            response_format=json_response_format("inspection_batch", BATCH_VERDICT_SCHEMA)
+        )) if batches else []
+        for (batch, _), response in zip(batches, responses):
+            if isinstance(response, Exception):
+                logging.error(f"Batched inspection of {len(batch)} items failed: {response}")
+                continue
+            verdicts.update(parse_batch_response(response, batch))
+        if batches:
+            logging.info(f"Batched inspection covered {len(verdicts)} of {len(items)} items in {len(batches)} requests")
+
+    remaining = [item for item in items if item.id not in verdicts]
+    response_format = json_response_format("inspection", VERDICT_SCHEMA)
+    # A verdict that fails to parse is re-asked on its own, uncached, instead of failing every field
+    for attempt in range(Config.INSPECTION_PARSE_RETRIES + 1):
+        if not remaining:
+            break
+        responses = run_async(llm.get_completions_many(
+            [build_inspection_prompt(item) for item in remaining],
+            use_cache=attempt == 0,
+            response_format=response_format
+        ))
+        unparsed = []
+        for item, response in zip(remaining, responses):
+            verdict = response if isinstance(response, Exception) else parse_validation_response(response)
+            if verdict is None:
+                unparsed.append(item)
+                verdict = ValueError("Inspection verdict could not be parsed")
+            verdicts[item.id] = verdict
+        if unparsed and attempt < Config.INSPECTION_PARSE_RETRIES:
+            logging.warning(f"Re-asking inspection for {len(unparsed)} items with unparseable verdicts")
+        remaining = unparsed
+    return [verdicts[item.id] for item in items]
 
 def determine_next_step(validation_result: dict) -> str:
     """Determine which agent to redirect to based on validation results."""
@@ -88,15 +254,59 @@ def inspect_content(state: State, llm: AIClient) -> State:
         state.inspection_results = []  # Store validation results for each item
         needs_reprocessing = False
         
-        for item in state.items:
-            if not all([item.title, item.content_tags, item.summary, item.news_snippet]):
+        candidates = [
+            item for item in state.items
+            if None not in (item.title, item.content_tags, item.summary, item.news_snippet)
+        ]
+        # Only items whose outputs changed since they last passed need a new verdict
+        dirty = [item for item in candidates if state.inspection_verdicts.get(item.id) != output_hash(item)]
+        # Outputs reused from an earlier run (see ResearchCrawler.hydrate_from_history) may have passed there already
+        stored = stored_passes(dirty)
+        for item in dirty:
+            if (item.fingerprint, output_hash(item)) in stored:
+                state.inspection_verdicts[item.id] = output_hash(item)
+        dirty = [item for item in dirty if state.inspection_verdicts.get(item.id) != output_hash(item)]
+        logging.info(
+            f"Inspecting {len(dirty)} changed items, {len(candidates) - len(dirty)} unchanged since they passed "
+            f"({len(stored)} in an earlier run)"
+        )
+
+        # Settle what the rules can before paying for model calls
+        rule_verdicts, rule_counts = {}, Counter()
+        for item in dirty:
+            verdict, fired = prevalidate(item)
+            rule_counts.update(fired)
+            if verdict is not None:
+                rule_verdicts[item.id] = verdict
+        plausible = [item for item in dirty if item.id not in rule_verdicts]
+        if dirty:
+            logging.info(
+                f"Pre-validation settled {len(rule_verdicts)} of {len(dirty)} items without the model "
+                f"(rules fired: {dict(rule_counts)}), {len(plausible)} go to LLM inspection"
+            )
+        model_verdicts = dict(zip([item.id for item in plausible], validate_items(llm, plausible))) if plausible else {}
+        verdicts = [rule_verdicts.get(item.id) or model_verdicts[item.id] for item in dirty]
+        
+        passed = []
+        for item, validation_result in zip(dirty, verdicts):
+            if isinstance(validation_result, Exception):
+                logging.error(f"Content validation failed for {item.id}: {validation_result}")
                 continue
-                
-            # Validate content
-            validation_result = asyncio.run(validate_content(llm, item))
             next_step = determine_next_step(validation_result)
-            
+            if next_step == "continue":
+                passed.append(item)
+
             if next_step != "continue":
+                attempts = state.inspection_attempts.get(item.id, 0)
+                if attempts >= Config.INSPECTION_MAX_RETRIES:
+                    logging.warning(f"Retry budget exhausted for {item.id}, keeping its output: {validation_result['issues']}")
+                    next_step = "continue"
+                else:
+                    state.inspection_attempts[item.id] = attempts + 1
+
+            if next_step == "continue":
+                state.inspection_verdicts[item.id] = output_hash(item)
+            else:
                 needs_reprocessing = True
                 # Store validation results and issues for the item
                 state.inspection_results.append({
@@ -115,6 +325,9 @@ def inspect_content(state: State, llm: AIClient) -> State:
                         item.summary = None
                     if not validation_result['snippet_valid']:
                         item.news_snippet = None
+        # Only genuine passes are stored; outputs kept after the retry budget ran out are inspected again next run
+        if passed:
+            record_passes(passed)
                 
         # Set the next step in the flow
         if needs_reprocessing:
@@ -1,13 +1,26 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.ai_client import AIClient
+from utils.ai_client import AIClient, json_response_format
+from utils.http_clients import run_async
 from models.models import State
-from prompts import TAGGING_PROMPT, TITLE_PROMPT
+from prompts import TAGGING_PROMPT, TITLE_PROMPT, TAG_AND_TITLE_PROMPT, CHUNK_SUMMARY_PROMPT
+from utils.token_budget import budget_text, count_tokens, split_into_chunks, strip_markdown_boilerplate
 import re
 from config import Config
 import logging
-import asyncio
+import json
+from typing import Optional
+
+TITLE_AND_TAGS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "tags": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["title", "tags"],
+    "additionalProperties": False
+}
 
 def clean_text(text: str) -> str:
     """
@@ -38,41 +51,157 @@ def clean_text(text: str) -> str:
         logging.error(f"Text cleaning failed: {e}")
         raise
 
-def generate_tags(llm: AIClient, text: str, source: str) -> tuple[list[str], list[str]]:
+def parse_tags(content: str) -> list[str]:
+    """Split a comma separated tagging response into a list of tags"""
+    return [tag.strip() for tag in content.strip().split(",") if tag.strip()]
+
+def parse_title_and_tags(content: str) -> Optional[tuple[str, list[str]]]:
+    """
+    Parse a TAG_AND_TITLE_PROMPT response, keeping only tags from Config.ai_tags.
+    Returns None when the response is unusable so the caller can fall back to separate calls.
+    """
     try:
-        messages = TAGGING_PROMPT.format(text=text, tags=Config.ai_tags)
+        parsed = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    if not isinstance(parsed, dict):
+        return None
+    title = parsed.get("title")
+    tags = parsed.get("tags")
+    if not isinstance(title, str) or not title.strip() or not isinstance(tags, list):
+        return None
+    allowed = {tag.lower() for tag in Config.ai_tags} | {"technology"}
+    content_tags = list(dict.fromkeys(
+        tag.strip().upper() for tag in tags
+        if isinstance(tag, str) and tag.strip().lower() in allowed
+    ))[:Config.MAX_TAGS]
+    if not content_tags:
+        return None
+    return title.strip(), content_tags
 
-        # Run async function in synchronous context
-        response = asyncio.run(llm.get_completion(messages))
-        content = response  
-        # Clean and parse tags
-        content_tags = [tag.strip() for tag in content.strip().split(",") if tag.strip()]
-        logging.info(f"Generated tags for {source}: {content_tags}")
-        return content_tags
-    except Exception as e:
-        logging.error(f"Tag generation failed: {e}")
-        raise
+def tag_and_title_separately(llm: AIClient, tag_items: list, title_items: list, use_cache: bool = True):
+    """Two-call path: one TAGGING_PROMPT per item in tag_items, one TITLE_PROMPT per item in title_items"""
+    prompts = [TAGGING_PROMPT.format(text=budget_text(item.cleaned_text, "tagging"), tags=Config.ai_tags) for item in tag_items]
+    prompts += [TITLE_PROMPT.format(text=budget_text(item.cleaned_text, "title"), language=Config.LANGUAGE) for item in title_items]
+    if not prompts:
+        return
+    # Submit every tagging and title prompt at once on a single event loop
+    responses = run_async(llm.get_completions_many(prompts, use_cache=use_cache))
+
+    for item, response in zip(tag_items, responses[:len(tag_items)]):
+        if isinstance(response, Exception):
+            logging.error(f"Tag generation failed for {item.source}: {response}")
+            continue
+        item.content_tags = parse_tags(response)
+        logging.info(f"Generated tags for {item.source}: {item.content_tags}")
+    for item, response in zip(title_items, responses[len(tag_items):]):
+        if isinstance(response, Exception):
+            logging.error(f"Title generation failed for {item.source}: {response}")
+            continue
+        item.title, item.title_generated = response, True
+        logging.info(f"Generated title for {item.source}: {item.title}")
+
+def tag_and_title_combined(llm: AIClient, items: list, use_cache: bool = True) -> list:
+    """One structured-output call per item; returns the items whose response could not be used"""
+    prompts = [
+        TAG_AND_TITLE_PROMPT.format(text=budget_text(item.cleaned_text, "tagging"), tags=Config.ai_tags, language=Config.LANGUAGE)
+        for item in items
+    ]
+    responses = run_async(llm.get_completions_many(
+        prompts, use_cache=use_cache, response_format=json_response_format("title_and_tags", TITLE_AND_TAGS_SCHEMA)
+    ))
+
+    failed = []
+    for item, response in zip(items, responses):
+        parsed = None if isinstance(response, Exception) else parse_title_and_tags(response)
+        if parsed is None:
+            logging.warning(f"Combined tag/title call unusable for {item.source}, falling back to separate calls")
+            failed.append(item)
+            continue
+        item.title, item.content_tags = parsed
+        item.title_generated = True
+        logging.info(f"Generated title and tags for {item.source}: {item.title} {item.content_tags}")
+    return failed
 
-def generate_title(llm: AIClient, text: str, source: str) -> str:
+def condense_long_texts(llm: AIClient, items: list):
+    """
+    Map-reduce documents above MAP_REDUCE_THRESHOLD_TOKENS: digest each chunk concurrently,
+    then use the joined digests as the item's cleaned_text for every later prompt.
+    """
+    long_items = [item for item in items if count_tokens(item.cleaned_text) > Config.MAP_REDUCE_THRESHOLD_TOKENS]
+    if not long_items:
+        return
+    spans, prompts = [], []
+    for item in long_items:
+        chunks = split_into_chunks(item.cleaned_text, Config.MAP_REDUCE_CHUNK_TOKENS)
+        spans.append((len(prompts), len(prompts) + len(chunks)))
+        prompts += [
+            CHUNK_SUMMARY_PROMPT.format(text=chunk, index=index, total=len(chunks), max_words=Config.MAP_REDUCE_CHUNK_WORDS)
+            for index, chunk in enumerate(chunks, 1)
+        ]
+    responses = run_async(llm.get_completions_many(prompts))
+
+    for item, (start, end) in zip(long_items, spans):
+        digests = responses[start:end]
+        if any(isinstance(digest, Exception) for digest in digests):
+            # Keep the full text; per-prompt budgets still truncate it
+            logging.error(f"Condensing long text failed for {item.url}, falling back to truncation")
+            continue
+        original_tokens = count_tokens(item.cleaned_text)
+        item.cleaned_text = " ".join(digest.strip() for digest in digests)
+        logging.info(f"Condensed {item.url} from {original_tokens} to {count_tokens(item.cleaned_text)} tokens")
+
+def tag_locally(items: list) -> list:
+    """Tag items with the embedding classifier; returns the low-confidence items left for the LLM"""
     try:
-        messages = TITLE_PROMPT.format(text=text, language=Config.LANGUAGE)
-        response = asyncio.run(llm.get_completion(messages))
-        title = response
-        logging.info(f"Generated title for {source}: {title}")
-        return title
+        from utils.tag_classifier import get_tag_classifier
+        predictions = get_tag_classifier().classify([item.cleaned_text for item in items])
     except Exception as e:
-        logging.error(f"Title generation failed: {e}")
-        raise
+        logging.error(f"Local tag classifier failed, using the LLM tagger: {e}")
+        return items
+    remaining = []
+    for item, tags in zip(items, predictions):
+        if tags is None:
+            remaining.append(item)
+            continue
+        item.content_tags = tags
+        logging.info(f"Tagged {item.source} locally: {tags}")
+    return remaining
 
 def process_and_tag(state: State, llm: AIClient) -> State:
     try:
-        for item in state.items:
-            if item.cleaned_text is None:
-                item.cleaned_text = clean_text(item.content_snippet)
-                item.content_tags = generate_tags(llm, item.cleaned_text, item.source)
-                if item.title is None:
-                    item.title = generate_title(llm, item.cleaned_text, item.source)
-                logging.info("Cleaned text and generated title for item")
+        pending = [item for item in state.items if item.cleaned_text is None]
+        for item in pending:
+            item.cleaned_text = clean_text(strip_markdown_boilerplate(item.content_snippet))
+        condense_long_texts(llm, pending)
+
+        untitled = [item for item in pending if item.title is None]
+        tag_items = [item for item in pending if item.title is not None]
+        if Config.COMBINED_TAG_TITLE and untitled:
+            untitled = tag_and_title_combined(llm, untitled)
+            tag_items += untitled
+        else:
+            tag_items = pending
+        if Config.TAG_CLASSIFIER_ENABLED and tag_items:
+            tag_items = tag_locally(tag_items)
+        tag_and_title_separately(llm, tag_items, untitled)
+
+        # Fields cleared by the inspector are regenerated without the cache, which would return the rejected output
+        pending_ids = {item.id for item in pending}
+        retry = [item for item in state.items if item.id not in pending_ids]
+        retry_both = [item for item in retry if item.title is None and item.content_tags is None]
+        if Config.COMBINED_TAG_TITLE and retry_both:
+            # Items that failed the combined call fall through to the separate calls below
+            failed = tag_and_title_combined(llm, retry_both, use_cache=False)
+            logging.info(f"Regenerated title and tags for {len(retry_both) - len(failed)} items in one call after inspection")
+        retry_tags = [item for item in retry if item.content_tags is None]
+        retry_titles = [item for item in retry if item.title is None]
+        if retry_tags or retry_titles:
+            tag_and_title_separately(llm, retry_tags, retry_titles, use_cache=False)
+            logging.info(f"Regenerated {len(retry_tags)} tag sets and {len(retry_titles)} titles after inspection")
+
+        if pending:
+            logging.info(f"Cleaned text and generated tags for {len(pending)} items")
         for post in state.posts:
             if post.cleaned_text is None:
                 post.cleaned_text = clean_text(post.content_snippet)
@@ -15,6 +15,8 @@ from crawlers.arxiv_crawler import ArXivCrawler
 from crawlers.facebook_crawler import FacebookCrawler
 from crawlers.X_crawler import XCrawler
 from config import Config
+from models.database import Database
+from utils.fingerprint import content_fingerprint
 
 class ResearchCrawler:
     def __init__(self):
@@ -24,15 +26,38 @@ class ResearchCrawler:
         self.arxiv_crawler = ArXivCrawler()
         self.facebook_crawler = FacebookCrawler()
         self.x_crawler = XCrawler()
+        self.db = Database()
+
+    def hydrate_from_history(self, items: List[Item]) -> int:
+        """Copy LLM outputs from the last run that saw identical content, so later stages skip it"""
+        for item in items:
+            item.fingerprint = content_fingerprint(item.url, item.content_snippet)
+        try:
+            previous = self.db.get_latest_items_by_fingerprint([item.fingerprint for item in items])
+        except Exception as e:
+            logging.error(f"Skipping reuse of previous outputs: {e}")
+            return 0
+        reused = 0
+        for item in items:
+            match = previous.get(item.fingerprint)
+            if match is None:
+                continue
+            item.cleaned_text = match.cleaned_text
+            item.content_tags = match.content_tags
+            item.title = match.title
+            item.summary = match.summary
+            item.news_snippet = match.news_snippet
+            reused += 1
+        return reused
 
 
     def crawl_data(self, state: State) -> State:
         """Main crawling function that combines GitHub, arXiv, and Facebook data with enrichment."""
         try:
             # Get trending GitHub repositories
+            github_items = []
             try:
                 repos = self.github_crawler.fetch_trending_repos(max_repos=Config.GITHUB_MAX_REPOS)
-                github_items = []
                 
                 for repo in repos:
                     data = self.github_crawler.grab_readme(repo)
@@ -119,6 +144,9 @@ class ResearchCrawler:
                         )
                         x_posts.append(post)
 
+            reused = self.hydrate_from_history(github_items + arxiv_items)
+            logging.info(f"Reused previous outputs for {reused} unchanged items")
+
             # Combine all items
             state.items.extend(github_items)
             state.items.extend(arxiv_items)
@@ -6,13 +6,11 @@ from models.database import Database
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Tuple, Optional
-import pandas as pd
-from bertopic import BERTopic
 from utils.ai_client import AIClient
+from utils.http_clients import run_async
 import numpy as np
 from collections import Counter
 import json
-import asyncio
 from prompts import SOCIAL_PROMPT
 import uuid
 from datetime import timezone
@@ -73,6 +71,9 @@ class SocialAnalyzer:
             
             logging.info(f"Starting clustering with {len(titles)} titles")
             
+            # Imported here because bertopic pulls in umap, hdbscan and pandas
+            from bertopic import BERTopic
+
             # Initialize BERTopic with Voyage embedding model
             self.topic_model = BERTopic(
                 embedding_model=self.embedding_model,
@@ -363,7 +364,7 @@ class SocialAnalyzer:
             
             # Generate report using LLM (synchronous)
             logging.info("Generating report using LLM...")
-            report = asyncio.run(self.llm.get_completion(prompt))
+            report = run_async(self.llm.get_completion(prompt))
             
             logging.info("Report generated successfully")
             return report
@@ -500,9 +501,6 @@ Please provide a 2-3 sentence summary of the main trends or topics discussed in
             logging.error(f"Traceback: {traceback.format_exc()}")
             # Return state even if analysis fails
             return state
-        finally:
-            if hasattr(self, 'db') and self.db.session:
-                self.db.session.close()
 
 
 def analyze_social_trends(state: State, llm: AIClient) -> State:
@@ -2,29 +2,59 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.ai_client import AIClient
-from models.models import State
+from utils.http_clients import run_async
+from models.models import State, Item, Post
 from prompts import SUMMARY_PROMPT, NEWS_SNIPPET_PROMPT
 import logging
 import asyncio
+from typing import List
 from config import Config
-from utils.qwen import get_qwen_output
+from utils.token_budget import budget_text
+
+async def write_item(llm: AIClient, item: Item, semaphore: asyncio.Semaphore, use_cache: bool):
+    """Run one item's summary -> snippet chain; each LLM call holds a slot of the global cap"""
+    try:
+        # A summary the inspector accepted is kept; only the snippet is rewritten
+        if item.summary is None:
+            messages = SUMMARY_PROMPT.format(text=budget_text(item.cleaned_text, "summary"), language=Config.LANGUAGE)
+            async with semaphore:
+                item.summary = await llm.get_completion(messages, use_cache=use_cache)
+
+        messages = NEWS_SNIPPET_PROMPT.format(text=budget_text(item.cleaned_text, "snippet"), summary=item.summary, title=item.title, url=item.url, language=Config.LANGUAGE, tag=item.content_tags)
+        async with semaphore:
+            item.news_snippet = await llm.get_completion(messages, use_cache=use_cache)
+    except Exception as e:
+        logging.error(f"Summary/snippet generation failed for {item.url}: {e}")
+
+def title_posts(posts: List[Post]):
+    """Title posts with the local Qwen model in padded batches"""
+    # Imported here so torch and the model code only load when there are posts to title
+    from utils.qwen import get_qwen_outputs
+    titles = get_qwen_outputs([post.cleaned_text for post in posts])
+    for post, title in zip(posts, titles):
+        post.title = title
+
+async def run_stage(llm: AIClient, items: List[Item], use_cache: List[bool], posts: List[Post]):
+    """Schedule every item chain as its own task, alongside Qwen titling on a worker thread"""
+    semaphore = asyncio.Semaphore(Config.LLM_MAX_CONCURRENCY)
+    tasks = [write_item(llm, item, semaphore, cached) for item, cached in zip(items, use_cache)]
+    if posts:
+        tasks.append(asyncio.to_thread(title_posts, posts))
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logging.error(f"Post titling failed: {result}")
 
 def summarize_and_write(state: State, llm: AIClient) -> State:
     try:
-        for item in state.items:
-            if  item.summary is None:
-                messages = SUMMARY_PROMPT.format(text=item.cleaned_text, language=Config.LANGUAGE)
-                summary_response = asyncio.run(llm.get_completion(messages))
-                item.summary = summary_response
+        pending = [item for item in state.items if item.summary is None or item.news_snippet is None]
+        # Items rejected by the inspector must not be served their previous output from the cache
+        rejected_ids = {result["item_id"] for result in state.inspection_results}
+        use_cache = [item.id not in rejected_ids for item in pending]
+        untitled_posts = [post for post in state.posts if post.title is None]
 
-                messages = NEWS_SNIPPET_PROMPT.format(text=item.cleaned_text, summary=item.summary, title=item.title, url=item.url, language=Config.LANGUAGE, tag=item.content_tags)
-                snippet_response = asyncio.run(llm.get_completion(messages))
-                item.news_snippet = snippet_response
-        for post in state.posts:
-            if post.title is None:
-                messages = post.cleaned_text
-                summary_response = get_qwen_output(messages)
-                post.title = summary_response
+        if pending or untitled_posts:
+            run_async(run_stage(llm, pending, use_cache, untitled_posts))
         logging.info("Summarization and news writing completed")
         return state
     except Exception as e:
@@ -1,25 +1,14 @@
-from flask import Flask, render_template, jsonify, Response
+from flask import Flask, render_template, jsonify, request, Response
 from datetime import datetime
-import pandas as pd
-from sqlalchemy import create_engine
 from models.models import DBItem,  DBHotTopic
-from sqlalchemy.orm import sessionmaker
+from models.database import Database, get_engine, get_session_factory, tags_filter
 import markdown2
-from config import Config
 from prometheus_client import Counter, Histogram, generate_latest
 
 app = Flask(__name__)
 
-# Database setup
-engine = create_engine(
-    Config.get_database_url(),
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_pre_ping=True,  # Add connection health check
-    pool_recycle=3600    # Recycle connections after 1 hour
-)
-Session = sessionmaker(bind=engine)
+# Database setup: the shared engine, pooled with the Config.DB_POOL_* settings
+Session = get_session_factory()
 
 # Add these metrics
 REQUEST_COUNT = Counter('http_requests_total', 'Total HTTP requests')
@@ -37,7 +26,8 @@ def format_tags(tags):
     """Format tags list into markdown style tags"""
     if not tags:
         return []
-    return [f"#{tag}" for tag in tags]
+    # Tags are stored normalized to lowercase; show them in the pipeline's uppercase style
+    return [f"#{tag.upper()}" for tag in tags]
 
 
 def get_source_from_url(url):
@@ -49,11 +39,15 @@ def get_source_from_url(url):
         return 'arxiv'
     return 'other'
 
-def get_news_data(selected_date=None):
+def get_news_data(selected_date=None, tags=None, match_all=False):
     session = Session()
     try:
         # Query all items ordered by timestamp
         query = session.query(DBItem).order_by(DBItem.timestamp.desc())
+
+        # If tags are provided, filter inside the database on the GIN-indexed tags
+        if tags:
+            query = query.filter(tags_filter(tags, match_all, get_engine().dialect.name))
         
         # If date is provided, filter by date
         if selected_date:
@@ -127,7 +121,10 @@ def index():
 def get_news(date):
     try:
         selected_date = datetime.strptime(date, '%Y-%m-%d')
-        news_items = get_news_data(selected_date)
+        # ?tags=a,b (or repeated ?tags=) keeps items with any of the tags; &match=all requires every tag
+        tags = [tag for value in request.args.getlist('tags') for tag in value.split(',') if tag.strip()]
+        match_all = request.args.get('match', 'any') == 'all'
+        news_items = get_news_data(selected_date, tags, match_all)
         reports = get_reports(selected_date)
         
         # Process items and articles
@@ -138,7 +135,8 @@ def get_news(date):
             'status': 'success',
             'count': len(news_data),
             'data': news_data,
-            'reports': reports_data
+            'reports': reports_data,
+            'tag_counts': Database().get_tag_facets(selected_date.date())
         })
     except Exception as e:
         return jsonify({
@@ -13,10 +13,58 @@ class Config:
     AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
     AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION")
     AZURE_OPENAI_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    AZURE_OPENAI_RPM = int(os.getenv("AZURE_OPENAI_RPM", "300"))
+    AZURE_OPENAI_TPM = int(os.getenv("AZURE_OPENAI_TPM", "100000"))
+    LLM_EXPECTED_OUTPUT_TOKENS = 500
+    # Output mode for JSON prompts: "json_object", "json_schema" (strict structured output, needs an
+    # API version that supports it; falls back to json_object when rejected) or "none"
+    LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "json_object")
+
+    # Retry scheduling shared by the Azure OpenAI and Voyage limiters
+    RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "6"))
+    RETRY_BASE_DELAY = 1.0
+    RETRY_MAX_DELAY = 60.0
+    RETRY_DEADLINE = float(os.getenv("RETRY_DEADLINE", "300"))
+    CHARS_PER_TOKEN = 3
+
+    # LLM completion cache ("postgres", "sqlite" or "none")
+    LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "postgres")
+    LLM_CACHE_SQLITE_PATH = os.getenv("LLM_CACHE_SQLITE_PATH", "llm_cache.sqlite3")
+    LLM_CACHE_TTL_HOURS = int(os.getenv("LLM_CACHE_TTL_HOURS", "720"))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+    # Storage precision for cached embedding vectors ("float16" or "float32")
+    EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")
 
     # Voyage AI Settings
     VOYAGE_API_KEY = os.getenv("VOYAGE_API_KEY")
     VOYAGE_MODEL = os.getenv("VOYAGE_MODEL", "voyage-large-2")
+    # Request splitting for embeddings (provider caps: 1000 inputs, 120K tokens per request)
+    VOYAGE_MAX_BATCH_SIZE = int(os.getenv("VOYAGE_MAX_BATCH_SIZE", "128"))
+    VOYAGE_MAX_BATCH_TOKENS = int(os.getenv("VOYAGE_MAX_BATCH_TOKENS", "100000"))
+    VOYAGE_MAX_CONCURRENCY = int(os.getenv("VOYAGE_MAX_CONCURRENCY", "4"))
+    VOYAGE_RPM = int(os.getenv("VOYAGE_RPM", "2000"))
+    VOYAGE_TPM = int(os.getenv("VOYAGE_TPM", "3000000"))
+    VOYAGE_TIMEOUT = 30.0
+
+    # Shared HTTP connection pools
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+    HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+
+    # Qwen post-titling model
+    QWEN_BASE_MODEL = os.getenv("QWEN_BASE_MODEL", "Qwen/Qwen3-8B")
+    # Written once by scripts/export_qwen.py
+    QWEN_MERGED_MODEL_PATH = os.getenv("QWEN_MERGED_MODEL_PATH", "model/qwen_merged")
+    QWEN_DEVICE = os.getenv("QWEN_DEVICE")  # "cuda" or "cpu"; auto-detected when unset
+    QWEN_NUM_THREADS = int(os.getenv("QWEN_NUM_THREADS", "0"))
+    QWEN_BATCH_SIZE = int(os.getenv("QWEN_BATCH_SIZE", "8"))
+    QWEN_MAX_NEW_TOKENS = int(os.getenv("QWEN_MAX_NEW_TOKENS", "160"))
+    QWEN_MAX_INPUT_TOKENS = int(os.getenv("QWEN_MAX_INPUT_TOKENS", "1024"))
 
     # Database Settings
     DB_USER = os.getenv("DB_USER", "postgres")
@@ -24,9 +72,55 @@ class Config:
     DB_HOST = os.getenv("DB_HOST", "db")
     DB_PORT = os.getenv("DB_PORT", "5432")
     DB_NAME = os.getenv("DB_NAME", "netmind_stalk")
+    # Connection pool of the process-wide engine shared by the pipeline and the dashboard
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+    # Stored posts older than this are deleted; new posts are deduplicated against the rest
+    POST_RETENTION_DAYS = int(os.getenv("POST_RETENTION_DAYS", "5"))
 
 
     LANGUAGE = "English"
+
+    # Ask for title and tags in one structured-output call instead of two. Crawlers set titles for
+    # every source, so this applies to untitled items and to items whose title and tags were both
+    # rejected by the inspector; everything else only needs the tagging call.
+    COMBINED_TAG_TITLE = os.getenv("COMBINED_TAG_TITLE", "true").lower() == "true"
+    MAX_TAGS = 5
+
+    # Local embedding tagger in front of the LLM tagger
+    TAG_CLASSIFIER_ENABLED = os.getenv("TAG_CLASSIFIER_ENABLED", "true").lower() == "true"
+    # Fallback cutoff until scripts/calibrate_tag_classifier.py has written TAG_CLASSIFIER_CALIBRATION_PATH
+    TAG_CLASSIFIER_MIN_SCORE = float(os.getenv("TAG_CLASSIFIER_MIN_SCORE", "0.45"))
+    TAG_CLASSIFIER_MARGIN = float(os.getenv("TAG_CLASSIFIER_MARGIN", "0.05"))
+    TAG_CLASSIFIER_CALIBRATION_PATH = os.getenv("TAG_CLASSIFIER_CALIBRATION_PATH", "tag_classifier_calibration.json")
+    # Share of classifier-tagged items whose top tag the LLM tagger must agree with
+    TAG_CLASSIFIER_TARGET_PRECISION = float(os.getenv("TAG_CLASSIFIER_TARGET_PRECISION", "0.9"))
+
+    # Input token budgets per prompt; longer documents are condensed chunk by chunk first
+    PROMPT_TOKEN_BUDGETS = {
+        "tagging": 2000,
+        "title": 1500,
+        "summary": 4000,
+        "snippet": 4000,
+        "inspection": 4000,
+        "inspection_batch": 1500,
+    }
+    MAP_REDUCE_THRESHOLD_TOKENS = 6000
+    MAP_REDUCE_CHUNK_TOKENS = 3000
+    MAP_REDUCE_CHUNK_WORDS = 250
+
+    # Times one item may be sent back for regeneration before its output is accepted as is
+    INSPECTION_MAX_RETRIES = int(os.getenv("INSPECTION_MAX_RETRIES", "2"))
+    # Re-asks of the inspection prompt alone when its verdict cannot be parsed
+    INSPECTION_PARSE_RETRIES = int(os.getenv("INSPECTION_PARSE_RETRIES", "1"))
+    # Pack several items into one inspection request, up to these limits
+    INSPECTION_BATCH_ENABLED = os.getenv("INSPECTION_BATCH_ENABLED", "true").lower() == "true"
+    INSPECTION_BATCH_MAX_ITEMS = int(os.getenv("INSPECTION_BATCH_MAX_ITEMS", "8"))
+    INSPECTION_BATCH_MAX_TOKENS = int(os.getenv("INSPECTION_BATCH_MAX_TOKENS", "12000"))
+    # NEWS_SNIPPET_PROMPT does not ask for the link (the dashboard renders item.url itself), so this rule is opt-in
+    PREVALIDATION_REQUIRE_URL = os.getenv("PREVALIDATION_REQUIRE_URL", "false").lower() == "true"
     
     # Database URL
     @classmethod
@@ -34,6 +128,19 @@ class Config:
         return f"postgresql://{cls.DB_USER}:{cls.DB_PASSWORD}@{cls.DB_HOST}:{cls.DB_PORT}/{cls.DB_NAME}"
 
     NOVELTY_DAYS = 7
+    # Semantic dedup of new items against the items stored in the last NOVELTY_DAYS
+    SEMANTIC_DUPLICATE_THRESHOLD = float(os.getenv("SEMANTIC_DUPLICATE_THRESHOLD", "0.92"))
+    NOVELTY_TEXT_TOKENS = 512
+    # Neighbours checked per item, so a same-URL hit (an earlier version of the page) does not hide a real duplicate
+    NOVELTY_TOP_K = int(os.getenv("NOVELTY_TOP_K", "5"))
+
+    # Near-duplicate detection: MinHash signatures over word shingles, with an LSH band index
+    MINHASH_NUM_PERM = 128
+    MINHASH_BANDS = 16
+    MINHASH_SHINGLE_SIZE = 3
+    # Texts with fewer words (empty READMEs, emoji-only posts, failed scrapes) get no signature
+    MINHASH_MIN_TOKENS = int(os.getenv("MINHASH_MIN_TOKENS", "5"))
+    NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
 
     # ArXiv Settings
     ARXIV_SUBJECT = ["cs.AI", "cs.IR", "cs.LG", "cs.MA", "cs.CV", "cs.CL"]
@@ -2,6 +2,10 @@ from datetime import datetime
 import feedparser
 from typing import List, Tuple
 import logging
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.http_clients import get_sync_session
 
 class ArXivCrawler:
     @staticmethod
@@ -43,7 +47,9 @@ class ArXivCrawler:
                 )
 
                 # Fetch and parse the Atom feed
-                feed = feedparser.parse(url)
+                response = get_sync_session().get(url, timeout=30)
+                response.raise_for_status()
+                feed = feedparser.parse(response.content)
                 logging.info(f"Fetched {len(feed.entries)} entries from arXiv for subject: {subject}")
                 for entry in feed.entries:
                     links.append(entry.id)
@@ -1,8 +1,11 @@
-import requests
 from bs4 import BeautifulSoup
 from typing import List, Dict
 import logging
 import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.http_clients import get_sync_session
 
 class GitHubCrawler:
     TRENDING_URL = "https://github.com/trending?since=daily"
@@ -18,7 +21,7 @@ class GitHubCrawler:
     def fetch_trending_repos(max_repos: int = 20) -> List[str]:
         """Return a list like ["owner1/repo1", "owner2/repo2", …]."""
         try:
-            resp = requests.get(GitHubCrawler.TRENDING_URL, headers=GitHubCrawler.HEADERS, timeout=15)
+            resp = get_sync_session().get(GitHubCrawler.TRENDING_URL, headers=GitHubCrawler.HEADERS, timeout=15)
             resp.raise_for_status()
 
             soup = BeautifulSoup(resp.text, "html.parser")
@@ -45,7 +48,7 @@ class GitHubCrawler:
             raw_url = ""
             for br in branches:
                 url = f"https://raw.githubusercontent.com/{owner}/{repo}/{br}/README.md"
-                r = requests.get(url, headers=GitHubCrawler.HEADERS, timeout=15)
+                r = get_sync_session().get(url, headers=GitHubCrawler.HEADERS, timeout=15)
                 if r.status_code == 200 and r.text.strip():
                     raw_url = url
                     content = r.text
@@ -3,14 +3,9 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from langgraph.graph import StateGraph
 from models.models import State, Item
-from agents.research import crawl_data
-from agents.process import process_and_tag
-from agents.summarize import summarize_and_write
-from agents.inspector import inspect_content
-from agents.filter import filter_output
-from agents.social import analyze_social_trends
-from utils.ai_client import AIClient
-from models.database import Database
+from utils.ai_client import AIClient, create_cache_schema
+from models.database import Database, create_schema
+from utils.http_clients import close_sync_session
 from config import Config
 import logging
 from typing import Dict, Any, Optional
@@ -42,25 +37,60 @@ def save_state_to_db(db: Database, state: Dict[str, Any]) -> None:
         items_to_save = [Item(**item) if isinstance(item, dict) else item for item in state['items']]
         db.save_items(items_to_save)
         logging.info(f"Saved {len(items_to_save)} items to database")
+        # Only stored items join the in-memory novelty index used by the next run's semantic dedup
+        from agents.dedup import index_saved_items
+        index_saved_items(items_to_save)
     
     if 'hot_topics' in state:
         db.save_hot_topics(state['hot_topics'])
         logging.info(f"Saved hot topics to database")
 
+# Each node imports its agent on first use, so heavy dependencies (crawlers, bertopic,
+# torch) load only when the node runs instead of before the crawl starts.
+def crawl_node(state: State) -> State:
+    from agents.research import crawl_data
+    return crawl_data(state)
+
+def dedup_node(state: State) -> State:
+    from agents.dedup import deduplicate
+    return deduplicate(state)
+
+def process_node(state: State, llm: AIClient) -> State:
+    from agents.process import process_and_tag
+    return process_and_tag(state, llm)
+
+def summarize_node(state: State, llm: AIClient) -> State:
+    from agents.summarize import summarize_and_write
+    return summarize_and_write(state, llm)
+
+def inspect_node(state: State, llm: AIClient) -> State:
+    from agents.inspector import inspect_content
+    return inspect_content(state, llm)
+
+def filter_node(state: State) -> State:
+    from agents.filter import filter_output
+    return filter_output(state)
+
+def social_node(state: State, llm: AIClient) -> State:
+    from agents.social import analyze_social_trends
+    return analyze_social_trends(state, llm)
+
 def create_workflow_graph(llm: AIClient) -> StateGraph:
     """Create and configure the workflow graph."""
     graph = StateGraph(State)
     
     # Add nodes
-    graph.add_node("crawl", crawl_data)
-    graph.add_node("process", lambda state: process_and_tag(state, llm))
-    graph.add_node("summarize", lambda state: summarize_and_write(state, llm))
-    graph.add_node("inspect", lambda state: inspect_content(state, llm))
-    graph.add_node("filter", lambda state: filter_output(state))
-    graph.add_node("social", lambda state: analyze_social_trends(state, llm))
+    graph.add_node("crawl", crawl_node)
+    graph.add_node("dedup", dedup_node)
+    graph.add_node("process", lambda state: process_node(state, llm))
+    graph.add_node("summarize", lambda state: summarize_node(state, llm))
+    graph.add_node("inspect", lambda state: inspect_node(state, llm))
+    graph.add_node("filter", lambda state: filter_node(state))
+    graph.add_node("social", lambda state: social_node(state, llm))
 
     # Set up the main flow
-    graph.add_edge("crawl", "process")
+    graph.add_edge("crawl", "dedup")
+    graph.add_edge("dedup", "process")
     graph.add_edge("process", "summarize")
     graph.add_edge("summarize", "inspect")
     graph.add_edge("filter", "social")
@@ -83,6 +113,14 @@ def create_workflow_graph(llm: AIClient) -> StateGraph:
 
 def main():
     try:
+        # Schema check once per run, not once per Database()
+        create_schema()
+        create_cache_schema()
+        if llm.cache is not None:
+            try:
+                llm.cache.evict()
+            except Exception as e:
+                logging.warning(f"LLM completion cache eviction failed: {e}")
 
         # Create and compile workflow
         graph = create_workflow_graph(llm)
@@ -100,8 +138,7 @@ def main():
         logging.error(f"Main execution failed: {e}")
         raise
     finally:
-        if db:
-            db.session.close()
+        close_sync_session()
 
 if __name__ == "__main__":
     logging.basicConfig(
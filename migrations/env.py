@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine, pool
+from models.models import Base
+from config import Config
+
+if context.config.config_file_name is not None:
+    fileConfig(context.config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def get_url() -> str:
+    # An explicit sqlalchemy.url (e.g. `alembic -x` setups or tests) wins over the app config
+    return context.config.get_main_option("sqlalchemy.url") or Config.get_database_url()
+
+
+def run_migrations_offline():
+    """Emit the migration SQL without connecting (`alembic upgrade head --sql`)"""
+    context.configure(url=get_url(), target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    engine = create_engine(get_url(), poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,141 @@
+"""Initial schema: pipeline tables, LLM/embedding caches and dedup columns
+
+Databases that predate migrations were built by Base.metadata.create_all and the old
+migrations/create_tables.py, so every step checks what already exists and this revision
+brings them to the same state as a fresh install.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+import hashlib
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def columns(table: str) -> set:
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def indexes(table: str) -> set:
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def add_column(table: str, column: sa.Column):
+    if column.name not in columns(table):
+        op.add_column(table, column)
+
+
+def create_index(name: str, table: str, cols: list, unique: bool = False):
+    if name not in indexes(table):
+        op.create_index(name, table, cols, unique=unique)
+
+
+def text_hash(text: str) -> str:
+    # Frozen copy of utils.fingerprint.text_hash, so this revision does not change with app code
+    return hashlib.sha256(" ".join(text.split()).casefold().encode("utf-8")).hexdigest()
+
+
+def backfill_post_hashes():
+    """Hash the stored posts so dedup covers them; repeats keep a NULL hash to satisfy the unique index"""
+    conn = op.get_bind()
+    taken = {row.content_hash for row in conn.execute(sa.text(
+        "SELECT content_hash FROM posts WHERE content_hash IS NOT NULL"
+    ))}
+    rows = conn.execute(sa.text(
+        "SELECT id, cleaned_text, content_snippet FROM posts WHERE content_hash IS NULL"
+    )).fetchall()
+    for row in rows:
+        content_hash = text_hash(row.cleaned_text or row.content_snippet)
+        if content_hash in taken:
+            continue
+        taken.add(content_hash)
+        conn.execute(sa.text("UPDATE posts SET content_hash = :hash WHERE id = :id"), {"hash": content_hash, "id": row.id})
+
+
+def upgrade():
+    if not has_table("items"):
+        op.create_table(
+            "items",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("url", sa.String(), nullable=False),
+            sa.Column("title", sa.String(), nullable=True),
+            sa.Column("content_snippet", sa.String(), nullable=False),
+            sa.Column("publication_date", sa.DateTime(), nullable=True),
+            sa.Column("cleaned_text", sa.String(), nullable=True),
+            sa.Column("content_tags", sa.JSON(), nullable=True),
+            sa.Column("timestamp", sa.DateTime(), nullable=True),
+            sa.Column("summary", sa.String(), nullable=True),
+            sa.Column("news_snippet", sa.String(), nullable=True),
+            sa.Column("source", sa.String(), nullable=True),
+        )
+    if not has_table("posts"):
+        op.create_table(
+            "posts",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("title", sa.String(), nullable=True),
+            sa.Column("content_snippet", sa.String(), nullable=False),
+            sa.Column("publication_date", sa.DateTime(), nullable=True),
+            sa.Column("cleaned_text", sa.String(), nullable=True),
+            sa.Column("source", sa.String(), nullable=True),
+        )
+    if not has_table("hot_topics"):
+        op.create_table(
+            "hot_topics",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("snippet", sa.String(), nullable=True),
+            sa.Column("publication_date", sa.DateTime(), nullable=True),
+        )
+
+    # Output reuse and dedup columns
+    add_column("items", sa.Column("fingerprint", sa.String(64), nullable=True))
+    create_index("ix_items_fingerprint", "items", ["fingerprint"])
+    for table in ("items", "posts"):
+        add_column(table, sa.Column("content_hash", sa.String(64), nullable=True))
+        add_column(table, sa.Column("minhash", sa.LargeBinary(), nullable=True))
+    backfill_post_hashes()
+    for table in ("items", "posts"):
+        create_index(f"ix_{table}_content_hash", table, ["content_hash"], unique=True)
+
+    if not has_table("minhash_bands"):
+        op.create_table(
+            "minhash_bands",
+            sa.Column("band_key", sa.String(32), primary_key=True),
+            sa.Column("kind", sa.String(8), primary_key=True),
+            sa.Column("row_id", sa.String(), primary_key=True),
+        )
+    create_index("ix_minhash_bands_row", "minhash_bands", ["kind", "row_id"])
+
+    # LLM completion and embedding caches
+    if not has_table("llm_completions"):
+        op.create_table(
+            "llm_completions",
+            sa.Column("key", sa.String(64), primary_key=True),
+            sa.Column("model", sa.String(), nullable=False),
+            sa.Column("response", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("last_accessed", sa.DateTime(), nullable=False),
+        )
+    create_index("ix_llm_completions_last_accessed", "llm_completions", ["last_accessed"])
+    if not has_table("embeddings"):
+        op.create_table(
+            "embeddings",
+            sa.Column("model", sa.String(), primary_key=True),
+            sa.Column("text_hash", sa.String(64), primary_key=True),
+            sa.Column("vector", sa.LargeBinary(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        )
+
+
+def downgrade():
+    for table in ("embeddings", "llm_completions", "minhash_bands", "hot_topics", "posts", "items"):
+        op.drop_table(table)
@@ -0,0 +1,40 @@
+"""B-tree indexes for the dashboard and pipeline read paths
+
+- items.timestamp: app.get_news_data filters and sorts on it
+- items.url: lookups of an item by its link
+- hot_topics.publication_date: app.get_reports filters and sorts on it
+- posts.publication_date: post retention and Database.get_all_posts range scans
+
+scripts/check_query_plans.py runs EXPLAIN on these queries to confirm they use the indexes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_items_timestamp", "items", ["timestamp"]),
+    ("ix_items_url", "items", ["url"]),
+    ("ix_hot_topics_publication_date", "hot_topics", ["publication_date"]),
+    ("ix_posts_publication_date", "posts", ["publication_date"]),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, cols in INDEXES:
+        # create_all on a fresh database may already have built them from the model definitions
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, cols)
+
+
+def downgrade():
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
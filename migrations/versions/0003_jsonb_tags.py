@@ -0,0 +1,93 @@
+"""JSONB item tags with a GIN index, normalized tags and per-day tag facets
+
+- items.content_tags: JSON -> JSONB on Postgres, indexed with GIN (jsonb_path_ops) for @> tag filters
+- stored tags rewritten to their normalized form, so 'MACHINE-LEARNING' and 'machine-learning' match
+- tag_facets: item count per (day, tag), backfilled from the stored items
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+import re
+from collections import Counter
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def normalize_tag(tag: str) -> str:
+    # Frozen copy of utils.tags.normalize_tag, so this revision does not change with app code
+    return re.sub(r"[\s_]+", "-", tag.strip().lstrip("#").strip().lower())
+
+
+def is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def items_table():
+    tags_type = JSONB() if is_postgres() else sa.JSON()
+    return sa.table("items", sa.column("id", sa.String), sa.column("timestamp", sa.DateTime), sa.column("content_tags", tags_type))
+
+
+def normalize_stored_tags():
+    conn = op.get_bind()
+    items = items_table()
+    for row in conn.execute(sa.select(items.c.id, items.c.content_tags).where(items.c.content_tags.isnot(None))).fetchall():
+        tags = row.content_tags if isinstance(row.content_tags, list) else []
+        normalized = list(dict.fromkeys(tag for tag in (normalize_tag(tag) for tag in tags if isinstance(tag, str)) if tag))
+        if normalized != row.content_tags:
+            conn.execute(items.update().where(items.c.id == row.id).values(content_tags=normalized))
+
+
+def backfill_tag_facets():
+    conn = op.get_bind()
+    items = items_table()
+    counts = Counter()
+    for row in conn.execute(sa.select(items.c.timestamp, items.c.content_tags).where(items.c.timestamp.isnot(None))):
+        counts.update((row.timestamp.date(), tag) for tag in row.content_tags or [])
+    facets = sa.table("tag_facets", sa.column("day", sa.Date), sa.column("tag", sa.String), sa.column("count", sa.Integer))
+    conn.execute(facets.delete())
+    if counts:
+        conn.execute(facets.insert(), [{"day": day, "tag": tag, "count": count} for (day, tag), count in counts.items()])
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if is_postgres():
+        column = next(column for column in inspector.get_columns("items") if column["name"] == "content_tags")
+        # create_all on a fresh database may already have built the column as JSONB
+        if not isinstance(column["type"], JSONB):
+            op.alter_column(
+                "items", "content_tags",
+                type_=JSONB(), existing_type=sa.JSON(), postgresql_using="content_tags::jsonb"
+            )
+    normalize_stored_tags()
+    if is_postgres() and "ix_items_content_tags" not in {index["name"] for index in inspector.get_indexes("items")}:
+        op.create_index(
+            "ix_items_content_tags", "items", ["content_tags"],
+            postgresql_using="gin", postgresql_ops={"content_tags": "jsonb_path_ops"}
+        )
+
+    if not inspector.has_table("tag_facets"):
+        op.create_table(
+            "tag_facets",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("tag", sa.String(), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False),
+        )
+    backfill_tag_facets()
+
+
+def downgrade():
+    op.drop_table("tag_facets")
+    if is_postgres():
+        op.drop_index("ix_items_content_tags", table_name="items")
+        op.alter_column(
+            "items", "content_tags",
+            type_=sa.JSON(), existing_type=JSONB(), postgresql_using="content_tags::json"
+        )
@@ -0,0 +1,42 @@
+"""Scope the unique item content hash to the crawl day
+
+Each day keeps its own row for content that trends again, so items.content_hash is
+unique per (content_hash, crawl_date) instead of globally. crawl_date is backfilled
+from timestamp; ix_items_content_hash stays as a plain lookup index.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "crawl_date" not in {column["name"] for column in inspector.get_columns("items")}:
+        op.add_column("items", sa.Column("crawl_date", sa.Date(), nullable=True))
+    items = sa.table("items", sa.column("timestamp", sa.DateTime), sa.column("crawl_date", sa.Date))
+    op.execute(
+        items.update()
+        .where(items.c.crawl_date.is_(None), items.c.timestamp.isnot(None))
+        .values(crawl_date=sa.func.date(items.c.timestamp))
+    )
+
+    indexes = {index["name"]: index for index in inspector.get_indexes("items")}
+    if indexes.get("ix_items_content_hash", {}).get("unique"):
+        op.drop_index("ix_items_content_hash", table_name="items")
+        op.create_index("ix_items_content_hash", "items", ["content_hash"])
+    if "ix_items_content_hash_day" not in indexes:
+        op.create_index("ix_items_content_hash_day", "items", ["content_hash", "crawl_date"], unique=True)
+
+
+def downgrade():
+    # Rows of the same content on different days would violate a global unique index, so it is not restored
+    op.drop_index("ix_items_content_hash_day", table_name="items")
+    op.drop_column("items", "crawl_date")
@@ -0,0 +1,31 @@
+"""Stored inspection passes
+
+inspection_passes records the (content fingerprint, output hash) pairs whose generated
+outputs passed inspection, so a run that reuses those outputs skips the inspector.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all on a fresh database may already have built the table
+    if not sa.inspect(op.get_bind()).has_table("inspection_passes"):
+        op.create_table(
+            "inspection_passes",
+            sa.Column("fingerprint", sa.String(64), primary_key=True),
+            sa.Column("output_hash", sa.String(64), primary_key=True),
+            sa.Column("passed_at", sa.DateTime(), nullable=False),
+        )
+
+
+def downgrade():
+    op.drop_table("inspection_passes")
@@ -1,103 +1,390 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from datetime import datetime, timedelta
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+import functools
 import logging
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from typing import List
-from models.models import Base, Item, Post, DBItem, DBPost, HotTopic, DBHotTopic
+from sqlalchemy import and_, create_engine, delete, func, or_, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from models.models import Base, Item, Post, DBItem, DBPost, HotTopic, DBHotTopic, DBMinHashBand, DBTagFacet, DBInspectionPass
 from config import Config
+from utils.fingerprint import text_hash
+from utils.minhash import band_keys, from_bytes
+from utils.tags import normalize_tags
 
 
 
+def get_engine(database_url: Optional[str] = None) -> Engine:
+    """One pooled engine per database URL for the whole process"""
+    return _create_engine(database_url or Config.get_database_url())
+
+@functools.lru_cache(maxsize=None)
+def _create_engine(database_url: str) -> Engine:
+    pool_options = {} if database_url.startswith("sqlite") else {
+        "pool_size": Config.DB_POOL_SIZE,
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "pool_timeout": Config.DB_POOL_TIMEOUT,
+        "pool_recycle": Config.DB_POOL_RECYCLE,
+    }
+    engine = create_engine(database_url, pool_pre_ping=True, **pool_options)
+    logging.info(f"Database engine created for {engine.url.host or engine.url.database}")
+    return engine
+
+def get_session_factory(database_url: Optional[str] = None) -> sessionmaker:
+    return _session_factory(get_engine(database_url))
+
+@functools.lru_cache(maxsize=None)
+def _session_factory(engine: Engine) -> sessionmaker:
+    # Loaded rows stay readable after the unit of work commits and closes
+    return sessionmaker(bind=engine, expire_on_commit=False)
+
+@contextmanager
+def session_scope(database_url: Optional[str] = None) -> Iterator[Session]:
+    """Unit of work: commit on success, roll back on error, always return the connection to the pool"""
+    session = get_session_factory(database_url)()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+def tags_filter(tags: List[str], match_all: bool = False, dialect: str = "postgresql"):
+    """
+    WHERE clause for items tagged with any (or, with match_all, every) of the given tags.
+    On Postgres these are JSONB containment tests served by ix_items_content_tags;
+    SQLite, used only for local runs, scans the arrays with json_each.
+    """
+    tags = normalize_tags(tags)
+    if dialect == "postgresql":
+        column = type_coerce(DBItem.content_tags, JSONB)
+        return column.contains(tags) if match_all else or_(*(column.contains([tag]) for tag in tags))
+    conditions = []
+    for tag in tags:
+        values = func.json_each(DBItem.content_tags).table_valued("value")
+        conditions.append(select(values.c.value).where(values.c.value == tag).exists())
+    return and_(*conditions) if match_all else or_(*conditions)
+
+def create_schema(database_url: Optional[str] = None):
+    """Create missing tables for runs without `alembic upgrade head` (a no-op on a migrated database)"""
+    Base.metadata.create_all(get_engine(database_url))
+
+
 class Database:
-    def __init__(self):
-        try:
-            # Create PostgreSQL database engine
-            self.engine = create_engine(Config.get_database_url())
-            Base.metadata.create_all(self.engine)
-            
-            # Create session factory
-            Session = sessionmaker(bind=self.engine)
-            self.session = Session()
-            
-            
-            logging.info(f"Database initialized at {Config.DB_HOST}:{Config.DB_PORT}")
-        except Exception as e:
-            logging.error(f"Failed to initialize database: {e}")
-            raise
+    """Pipeline reads and writes; every method runs in its own short session on the shared engine"""
+
+    def __init__(self, database_url: Optional[str] = None):
+        self.database_url = database_url
+
+    @property
+    def engine(self) -> Engine:
+        return get_engine(self.database_url)
+
+    def session_scope(self):
+        return session_scope(self.database_url)
+
+    def _insert(self, model):
+        """INSERT construct with ON CONFLICT support for the engine's dialect (SQLite only for local runs)"""
+        table = model.__table__
+        return sqlite_insert(table) if self.engine.dialect.name == "sqlite" else postgresql_insert(table)
+
+    @staticmethod
+    def _row(db_object) -> dict:
+        return {column.name: getattr(db_object, column.name) for column in db_object.__table__.columns}
+
+    def _upsert(self, session: Session, model, rows: List[dict], key: List[str]):
+        """Multi-row INSERT ... ON CONFLICT (key) DO UPDATE of every other column"""
+        if not rows:
+            return
+        stmt = self._insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key,
+            set_={column: stmt.excluded[column] for column in rows[0] if column not in key}
+        )
+        session.execute(stmt, rows)
 
     def save_items(self, items: List[Item]):
         try:
             for item in items:
-                db_item = DBItem.from_item(item)
-                self.session.merge(db_item)
-            self.session.commit()
-            logging.info(f"Saved {len(items)} items to database")
+                if item.content_hash is None:
+                    item.content_hash = text_hash(item.content_snippet)
+            with self.session_scope() as session:
+                # Content already stored for the same day updates that row; a later day gets its own row,
+                # so a repo that keeps trending still appears on every day's dashboard
+                keys = [(item.content_hash, item.timestamp.date() if item.timestamp else None) for item in items]
+                existing = self._item_ids_by_content_day(session, keys)
+                saved = {}
+                for item, key in zip(items, keys):
+                    if key in saved:
+                        continue
+                    item.id = existing.get(key, item.id)
+                    saved[key] = item
+                # Days the saved rows are moving out of, as well as into, need their facets recounted
+                days = {item.timestamp.date() for item in saved.values() if item.timestamp}
+                days |= self._item_days(session, [item.id for item in saved.values()])
+                self._upsert(session, DBItem, [self._row(DBItem.from_item(item)) for item in saved.values()], ["id"])
+                self._save_minhash_bands(session, "item", {item.id: item.minhash for item in saved.values() if item.minhash})
+                self._refresh_tag_facets(session, days)
+            logging.info(f"Saved {len(saved)} items to database ({len(items) - len(saved)} duplicates skipped)")
             
         except Exception as e:
-            self.session.rollback()
             logging.error(f"Failed to save items: {e}")
             raise
 
-    def save_post(self, post: Post):
+    @staticmethod
+    def _item_days(session: Session, ids: List[str]) -> Set[date]:
+        """Days of the stored items with the given ids"""
+        if not ids:
+            return set()
+        rows = session.query(DBItem.timestamp).filter(DBItem.id.in_(ids), DBItem.timestamp.isnot(None)).all()
+        return {row.timestamp.date() for row in rows}
+
+    def _refresh_tag_facets(self, session: Session, days: Set[date]):
+        """Recount the per-day tag facets of the given days from the stored items"""
+        if not days:
+            return
+        counts = Counter()
+        for day in days:
+            start = datetime.combine(day, time.min)
+            rows = session.query(DBItem.content_tags).filter(
+                DBItem.timestamp >= start, DBItem.timestamp < start + timedelta(days=1)
+            ).all()
+            counts.update((day, tag) for row in rows for tag in row.content_tags or [])
+        session.execute(delete(DBTagFacet).where(DBTagFacet.day.in_(days)).execution_options(synchronize_session=False))
+        if counts:
+            session.execute(self._insert(DBTagFacet), [
+                {"day": day, "tag": tag, "count": count} for (day, tag), count in counts.items()
+            ])
+
+    def save_posts(self, posts: List[Post]) -> int:
+        """Insert posts in one statement, skipping any whose content hash is already stored"""
         try:
-            db_post = DBPost.from_post(post)
-            self.session.add(db_post)
-            self.session.commit()
-            logging.info(f"Saved post for source {post.source}")
+            if not posts:
+                return 0
+            with self.session_scope() as session:
+                stmt = self._insert(DBPost).on_conflict_do_nothing().returning(DBPost.__table__.c.id)
+                inserted = set(session.execute(stmt, [self._row(DBPost.from_post(post)) for post in posts]).scalars())
+                self._save_minhash_bands(session, "post", {post.id: post.minhash for post in posts if post.id in inserted and post.minhash})
+            logging.info(f"Saved {len(inserted)} posts ({len(posts) - len(inserted)} already stored)")
+            return len(inserted)
         except Exception as e:
-            self.session.rollback()
-            logging.error(f"Failed to save post: {e}")
+            logging.error(f"Failed to save posts: {e}")
             raise
 
     def save_hot_topics(self, hot_topics: List[HotTopic]):
         try:
-            for hot_topic in hot_topics:
-                db_hot_topic = DBHotTopic.from_hot_topic(hot_topic)
-                self.session.merge(db_hot_topic)
-            self.session.commit()
+            with self.session_scope() as session:
+                self._upsert(session, DBHotTopic, [self._row(DBHotTopic.from_hot_topic(hot_topic)) for hot_topic in hot_topics], ["id"])
             logging.info(f"Saved {len(hot_topics)} hot topics to database")
         except Exception as e:
-            self.session.rollback()
             logging.error(f"Failed to save hot topics: {e}")
             raise
 
     def get_recent_items(self, days=7) -> List[Item]:
         try:
             cutoff = datetime.now() - timedelta(days=days)
-            db_items = self.session.query(DBItem).filter(DBItem.timestamp > cutoff).all()
-            items = [item.to_item() for item in db_items]
+            with self.session_scope() as session:
+                db_items = session.query(DBItem).filter(DBItem.timestamp > cutoff).all()
+                items = [item.to_item() for item in db_items]
             logging.info(f"Retrieved {len(items)} recent items")
             return items
         except Exception as e:
             logging.error(f"Failed to retrieve recent items: {e}")
             raise
 
+    def get_latest_items_by_fingerprint(self, fingerprints: List[str]) -> Dict[str, Item]:
+        """Most recent fully processed item for each content fingerprint"""
+        try:
+            if not fingerprints:
+                return {}
+            with self.session_scope() as session:
+                db_items = (
+                    session.query(DBItem)
+                    .filter(DBItem.fingerprint.in_(fingerprints), DBItem.news_snippet.isnot(None))
+                    .order_by(DBItem.timestamp.asc())
+                    .all()
+                )
+                # Later rows overwrite earlier ones, leaving the newest per fingerprint
+                items = {db_item.fingerprint: db_item.to_item() for db_item in db_items}
+            logging.info(f"Found {len(items)} previously processed items for {len(fingerprints)} fingerprints")
+            return items
+        except Exception as e:
+            logging.error(f"Failed to look up items by fingerprint: {e}")
+            raise
+
+    def get_passed_inspections(self, keys: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """The (fingerprint, output hash) pairs among keys whose outputs already passed inspection"""
+        try:
+            if not keys:
+                return set()
+            with self.session_scope() as session:
+                rows = session.query(DBInspectionPass.fingerprint, DBInspectionPass.output_hash).filter(
+                    DBInspectionPass.fingerprint.in_({fingerprint for fingerprint, _ in keys})
+                ).all()
+            return {(row.fingerprint, row.output_hash) for row in rows} & set(keys)
+        except Exception as e:
+            logging.error(f"Failed to look up inspection passes: {e}")
+            raise
+
+    def save_passed_inspections(self, keys: List[Tuple[str, str]]):
+        """Record (fingerprint, output hash) pairs that passed inspection; pairs already stored are kept"""
+        try:
+            if not keys:
+                return
+            now = datetime.now()
+            with self.session_scope() as session:
+                session.execute(self._insert(DBInspectionPass).on_conflict_do_nothing(), [
+                    {"fingerprint": fingerprint, "output_hash": digest, "passed_at": now} for fingerprint, digest in set(keys)
+                ])
+            logging.info(f"Saved {len(set(keys))} inspection passes")
+        except Exception as e:
+            logging.error(f"Failed to save inspection passes: {e}")
+            raise
+
+    def get_items_by_tags(self, tags: List[str], day: Optional[date] = None, match_all: bool = False) -> List[Item]:
+        """Items tagged with any (or, with match_all, all) of the given tags, newest first, optionally for one day"""
+        try:
+            if not tags:
+                return []
+            with self.session_scope() as session:
+                query = session.query(DBItem).filter(tags_filter(tags, match_all, self.engine.dialect.name))
+                if day:
+                    start = datetime.combine(day, time.min)
+                    query = query.filter(DBItem.timestamp >= start, DBItem.timestamp < start + timedelta(days=1))
+                items = [db_item.to_item() for db_item in query.order_by(DBItem.timestamp.desc()).all()]
+            logging.info(f"Retrieved {len(items)} items tagged {tags}")
+            return items
+        except Exception as e:
+            logging.error(f"Failed to retrieve items by tags: {e}")
+            raise
+
+    def get_tag_facets(self, day: date) -> Dict[str, int]:
+        """Item count per tag for one day, most used first"""
+        try:
+            with self.session_scope() as session:
+                rows = (
+                    session.query(DBTagFacet.tag, DBTagFacet.count)
+                    .filter(DBTagFacet.day == day)
+                    .order_by(DBTagFacet.count.desc(), DBTagFacet.tag)
+                    .all()
+                )
+            return {row.tag: row.count for row in rows}
+        except Exception as e:
+            logging.error(f"Failed to retrieve tag facets: {e}")
+            raise
+
+    @staticmethod
+    def _item_ids_by_content_day(session: Session, keys: List[Tuple[str, Optional[date]]]) -> Dict[Tuple[str, date], str]:
+        """Map (content hash, crawl day) -> id of the stored item with that content on that day"""
+        days = {day for _, day in keys if day}
+        if not days:
+            return {}
+        rows = session.query(DBItem.content_hash, DBItem.crawl_date, DBItem.id).filter(
+            DBItem.content_hash.in_({content_hash for content_hash, _ in keys}), DBItem.crawl_date.in_(days)
+        ).all()
+        return {(row.content_hash, row.crawl_date): row.id for row in rows}
+
+    def get_existing_post_hashes(self, hashes: List[str]) -> Set[str]:
+        """The subset of the given content hashes already stored in posts, in one indexed query"""
+        try:
+            if not hashes:
+                return set()
+            with self.session_scope() as session:
+                rows = session.query(DBPost.content_hash).filter(DBPost.content_hash.in_(set(hashes))).all()
+            return {row.content_hash for row in rows}
+        except Exception as e:
+            logging.error(f"Failed to look up post hashes: {e}")
+            raise
+
+    @staticmethod
+    def _delete_minhash_bands(session: Session, kind: str, row_ids: List[str]):
+        """Drop the LSH band rows of the given items or posts"""
+        if row_ids:
+            session.execute(
+                delete(DBMinHashBand)
+                .where(DBMinHashBand.kind == kind, DBMinHashBand.row_id.in_(row_ids))
+                .execution_options(synchronize_session=False)
+            )
+
+    def _save_minhash_bands(self, session: Session, kind: str, signatures: Dict[str, bytes]):
+        """Replace the LSH band rows of the given items or posts (id -> signature)"""
+        self._delete_minhash_bands(session, kind, list(signatures))
+        rows = [
+            {"band_key": key, "kind": kind, "row_id": row_id}
+            for row_id, signature in signatures.items()
+            for key in band_keys(from_bytes(signature))
+        ]
+        if rows:
+            session.execute(self._insert(DBMinHashBand).on_conflict_do_nothing(), rows)
+
+    def get_near_duplicate_candidates(self, keys: Iterable[str], kinds: Iterable[str]) -> List[Tuple[str, str, bytes, Optional[str]]]:
+        """Stored (kind, id, signature, url) rows sharing at least one LSH band key with the given keys"""
+        try:
+            keys = set(keys)
+            if not keys:
+                return []
+            with self.session_scope() as session:
+                matches = (
+                    session.query(DBMinHashBand.kind, DBMinHashBand.row_id)
+                    .filter(DBMinHashBand.band_key.in_(keys), DBMinHashBand.kind.in_(list(kinds)))
+                    .distinct()
+                    .all()
+                )
+                item_ids = [row_id for kind, row_id in matches if kind == "item"]
+                post_ids = [row_id for kind, row_id in matches if kind == "post"]
+                candidates = []
+                if item_ids:
+                    rows = session.query(DBItem.id, DBItem.minhash, DBItem.url).filter(
+                        DBItem.id.in_(item_ids), DBItem.minhash.isnot(None)
+                    ).all()
+                    candidates += [("item", row.id, row.minhash, row.url) for row in rows]
+                if post_ids:
+                    rows = session.query(DBPost.id, DBPost.minhash).filter(
+                        DBPost.id.in_(post_ids), DBPost.minhash.isnot(None)
+                    ).all()
+                    candidates += [("post", row.id, row.minhash, None) for row in rows]
+            logging.info(f"Found {len(candidates)} stored near-duplicate candidates")
+            return candidates
+        except Exception as e:
+            logging.error(f"Failed to look up near-duplicate candidates: {e}")
+            raise
+
     def get_all_posts(self, days=30) -> List[Post]:
         try:
             cutoff = datetime.now() - timedelta(days=days)
-            db_posts = self.session.query(DBPost).filter(DBPost.publication_date >= cutoff).all()
-            posts = [post.to_post() for post in db_posts]
+            with self.session_scope() as session:
+                db_posts = session.query(DBPost).filter(DBPost.publication_date >= cutoff).all()
+                posts = [post.to_post() for post in db_posts]
             logging.info(f"Retrieved {len(posts)} posts from database")
             return posts
         except Exception as e:
             logging.error(f"Failed to retrieve posts: {e}")
             raise
 
-    def remove_posts(self, posts: List[DBPost]):
+    def remove_posts_before(self, cutoff: datetime) -> int:
+        """Delete posts published before the cutoff, and their LSH band rows, with set-based DELETEs"""
         try:
-            for post in posts:
-                self.session.delete(post)
-            self.session.commit()
-            logging.info(f"Removed {len(posts)} posts from database")
+            expired = select(DBPost.id).where(DBPost.publication_date < cutoff)
+            with self.session_scope() as session:
+                session.execute(
+                    delete(DBMinHashBand)
+                    .where(DBMinHashBand.kind == "post", DBMinHashBand.row_id.in_(expired))
+                    .execution_options(synchronize_session=False)
+                )
+                result = session.execute(
+                    delete(DBPost).where(DBPost.publication_date < cutoff).execution_options(synchronize_session=False)
+                )
+            logging.info(f"Removed {result.rowcount} posts from database")
+            return result.rowcount
         except Exception as e:
-            self.session.rollback()
             logging.error(f"Failed to remove posts: {e}")
             raise
-
-    def __del__(self):
-        """Cleanup database connection"""
-        if hasattr(self, 'session'):
-            self.session.close()
@@ -1,9 +1,11 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy import Column, String, Date, DateTime, Integer, JSON, Index, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 import uuid
+from utils.tags import normalize_tags
 
 Base = declarative_base()
 
@@ -12,6 +14,7 @@ class Item(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     url: str
     title: Optional[str] = None
+    title_generated: bool = False  # True when the title was written by the LLM rather than the crawler
     content_snippet: str
     publication_date: Optional[datetime] = None
     cleaned_text: Optional[str] = None
@@ -20,6 +23,9 @@ class Item(BaseModel):
     timestamp: Optional[datetime] = Field(default_factory=datetime.now)
     summary: Optional[str] = None
     news_snippet: Optional[str] = None
+    fingerprint: Optional[str] = None
+    content_hash: Optional[str] = None
+    minhash: Optional[bytes] = None
 
 class Post(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -28,6 +34,8 @@ class Post(BaseModel):
     publication_date: Optional[datetime] = None
     cleaned_text: Optional[str] = None
     source: Optional[str] = None
+    content_hash: Optional[str] = None
+    minhash: Optional[bytes] = None
 
 class HotTopic(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -39,6 +47,9 @@ class State(BaseModel):
     items: List[Item] = Field(default_factory=list)
     posts: List[Post] = Field(default_factory=list)   
     inspection_results: List[Dict[str, Any]] = Field(default_factory=list)
+    # Item id -> hash of the outputs that last passed inspection, and regeneration attempts so far
+    inspection_verdicts: Dict[str, str] = Field(default_factory=dict)
+    inspection_attempts: Dict[str, int] = Field(default_factory=dict)
     hot_topics: List[HotTopic] = Field(default_factory=list)
     next_step: Optional[str] = None
 
@@ -47,16 +58,32 @@ class DBItem(Base):
     __tablename__ = 'items'
     
     id = Column(String, primary_key=True)
-    url = Column(String, nullable=False)
+    url = Column(String, nullable=False, index=True)
     title = Column(String, nullable=True)
     content_snippet = Column(String, nullable=False)
     publication_date = Column(DateTime, nullable=True)
     cleaned_text = Column(String, nullable=True)    
-    content_tags = Column(JSON, nullable=True)
-    timestamp = Column(DateTime, nullable=True)
+    # JSONB on Postgres, so tag filters are containment queries served by the GIN index
+    content_tags = Column(JSON().with_variant(JSONB(), 'postgresql'), nullable=True)
+    timestamp = Column(DateTime, nullable=True, index=True)
     summary = Column(String, nullable=True)
     news_snippet = Column(String, nullable=True)
     source = Column(String, nullable=True)
+    fingerprint = Column(String(64), nullable=True, index=True)
+    content_hash = Column(String(64), nullable=True, index=True)
+    minhash = Column(LargeBinary, nullable=True)
+    # Day of the crawl that wrote the row; each day keeps its own row for content that trends again
+    crawl_date = Column(Date, nullable=True)
+
+    __table_args__ = (
+        Index('ix_items_content_hash_day', 'content_hash', 'crawl_date', unique=True),
+        # jsonb_path_ops only supports @>, which is all the tag filters use, and is smaller than the default
+        Index(
+            'ix_items_content_tags', 'content_tags',
+            postgresql_using='gin', postgresql_ops={'content_tags': 'jsonb_path_ops'}
+        ).ddl_if(dialect='postgresql'),
+    )
+
     def to_item(self) -> Item:
         return Item(
             id=self.id,
@@ -70,6 +97,9 @@ class DBItem(Base):
             summary=self.summary,
             news_snippet=self.news_snippet,
             source=self.source,
+            fingerprint=self.fingerprint,
+            content_hash=self.content_hash,
+            minhash=self.minhash,
         )
 
     @classmethod
@@ -81,11 +111,15 @@ class DBItem(Base):
             content_snippet=item.content_snippet,
             publication_date=item.publication_date,
             cleaned_text=item.cleaned_text,
-            content_tags=item.content_tags,
+            content_tags=normalize_tags(item.content_tags),
             timestamp=item.timestamp,
             summary=item.summary,
             news_snippet=item.news_snippet,
             source=item.source,
+            fingerprint=item.fingerprint,
+            content_hash=item.content_hash,
+            minhash=item.minhash,
+            crawl_date=item.timestamp.date() if item.timestamp else None,
         )
 
 
@@ -95,9 +129,11 @@ class DBPost(Base):
     id = Column(String, primary_key=True)
     title = Column(String, nullable=True)
     content_snippet = Column(String, nullable=False)
-    publication_date = Column(DateTime, nullable=True)
+    publication_date = Column(DateTime, nullable=True, index=True)
     cleaned_text = Column(String, nullable=True)
     source = Column(String, nullable=True)
+    content_hash = Column(String(64), nullable=True, unique=True, index=True)
+    minhash = Column(LargeBinary, nullable=True)
 
     def to_post(self) -> Post:
         return Post(
@@ -107,6 +143,8 @@ class DBPost(Base):
             publication_date=self.publication_date,
             cleaned_text=self.cleaned_text,
             source=self.source,
+            content_hash=self.content_hash,
+            minhash=self.minhash,
         )
 
     @classmethod
@@ -118,6 +156,8 @@ class DBPost(Base):
             publication_date=post.publication_date,
             cleaned_text=post.cleaned_text,
             source=post.source,
+            content_hash=post.content_hash,
+            minhash=post.minhash,
         )
 
 class DBHotTopic(Base):
@@ -125,7 +165,7 @@ class DBHotTopic(Base):
     
     id = Column(String, primary_key=True)
     snippet = Column(String, nullable=True)
-    publication_date = Column(DateTime, nullable=True)
+    publication_date = Column(DateTime, nullable=True, index=True)
     
     def to_hot_topic(self) -> HotTopic:
         return HotTopic(
@@ -140,4 +180,57 @@ class DBHotTopic(Base):
             id=hot_topic.id,
             snippet=hot_topic.snippet,
             publication_date=hot_topic.publication_date,
-        )
\ No newline at end of file
+        )
+
+class DBCompletion(Base):
+    __tablename__ = 'llm_completions'
+
+    key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    response = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    last_accessed = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('ix_llm_completions_last_accessed', 'last_accessed'),
+    )
+
+
+class DBEmbedding(Base):
+    __tablename__ = 'embeddings'
+
+    model = Column(String, primary_key=True)
+    text_hash = Column(String(64), primary_key=True)
+    vector = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+
+class DBMinHashBand(Base):
+    """LSH bucket membership of stored items and posts, so near-duplicate lookups are index scans"""
+    __tablename__ = 'minhash_bands'
+
+    band_key = Column(String(32), primary_key=True)
+    kind = Column(String(8), primary_key=True)  # "item" or "post"
+    row_id = Column(String, primary_key=True)
+
+    __table_args__ = (
+        Index('ix_minhash_bands_row', 'kind', 'row_id'),
+    )
+
+
+class DBTagFacet(Base):
+    """Number of items per tag per day, kept current by Database.save_items for the dashboard facets"""
+    __tablename__ = 'tag_facets'
+
+    day = Column(Date, primary_key=True)
+    tag = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False)
+
+
+class DBInspectionPass(Base):
+    """Generated outputs that passed inspection, so a later run reusing them skips the inspector"""
+    __tablename__ = 'inspection_passes'
+
+    fingerprint = Column(String(64), primary_key=True)  # utils.fingerprint.content_fingerprint of the source
+    output_hash = Column(String(64), primary_key=True)  # agents.inspector.output_hash of the verdicted outputs
+    passed_at = Column(DateTime, nullable=False)
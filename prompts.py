@@ -41,6 +41,42 @@ Read the following content and generate a one-sentence title that best summarize
 {text}
 """
 
+CHUNK_SUMMARY_PROMPT = """
+You are condensing one part of a long document so that it can be processed as a whole later.
+
+**Task:**
+Rewrite the following part as a dense factual digest of at most {max_words} words. Keep names of projects, models, companies, datasets, numbers and claims. Drop installation steps, code, links and boilerplate. Output plain prose only.
+
+**Part {index} of {total}:**
+{text}
+"""
+
+TAG_AND_TITLE_PROMPT = """
+You are a specialized AI assistant for tagging and titling AI-related content. Read the text once and produce both a title and its tags.
+
+**Title requirements:**
+1. One sentence that is clear, complete, and fully representative of the passage.
+2. The title must be in {language}.
+3. The title must be no more than 10 words.
+4. Avoid unnecessary words or generic phrases.
+
+**Tag requirements:**
+1. You **MUST** choose tags *exclusively* from the following list: {tags}
+2. Select **up to a maximum of 5** of the most relevant tags.
+3. If the text is not AI Technology related, use ["TECHNOLOGY"].
+4. Always return tags in UPPERCASE.
+
+**Respond with a JSON object in this format:**
+{{
+    "title": "<title>",
+    "tags": ["<TAG>", "<TAG>"]
+}}
+
+---
+
+**Input Text: {text}**
+"""
+
 SUMMARY_PROMPT = """
 You are a specialized AI assistant for summarizing content. Your primary function is to accurately summarize text by creating a short paragraph that highlights the most important main idea of the text.
 
@@ -132,6 +168,51 @@ Note:
 - If the Generated News Snippet is 'Trash'. Response with a normal json object with all fields are true, and all issues are null.
 """
 
+BATCH_INSPECTION_PROMPT = """
+You are an expert content inspector. Your task is to validate the quality and accuracy of AI-generated content for several items at once.
+For every item below, analyze its content and identify any issues with:
+1. Title: Check if it accurately represents the content are matching with original content
+2. Tags: Verify if they are relevant and appropriate
+3. Summary: Ensure it captures the main points without hallucinations or inaccuracies
+4. News Snippet: Confirm it faithfully represents the original content
+
+Judge each item only against its own Original Content.
+
+{items}
+
+**Respond with a JSON object holding one verdict per item, in this format:**
+{{
+    "verdicts": [
+        {{
+            "item_id": "<Item ID>",
+            "title_valid": true,
+            "tags_valid": true,
+            "summary_valid": true,
+            "snippet_valid": true,
+            "issues": {{
+                "title": null,
+                "tags": null,
+                "summary": null,
+                "snippet": null
+            }}
+        }}
+    ]
+}}
+
+Note: 
+- Copy every Item ID exactly and return exactly one verdict per item.
+- For each field in "issues", provide a very short description of the problem if the corresponding *_valid field is false, otherwise leave it as null.
+- If an item's Generated News Snippet is 'Trash'. Return a verdict with all fields true, and all issues null, for that item.
+"""
+
+BATCH_INSPECTION_ITEM = """### Item ID: {item_id}
+Original Content: {content}
+Generated Title: {title}
+Generated Tags: {tags}
+Generated Summary: {summary}
+Generated News Snippet: {snippet}
+"""
+
 SOCIAL_PROMPT = """
 You are a social media analyst. Based on the following trending topic and related posts, write a comprehensive report.
 
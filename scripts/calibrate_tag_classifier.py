@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import logging
+from datetime import datetime
+import numpy as np
+from agents.process import parse_tags
+from models.database import Database
+from prompts import TAGGING_PROMPT
+from utils.ai_client import AIClient, create_cache_schema
+from utils.http_clients import run_async
+from utils.tag_classifier import TagClassifier, calibrate_threshold, save_calibration
+from utils.tags import normalize_tag, normalize_tags
+from utils.token_budget import budget_text
+from config import Config
+
+def calibrate_tag_classifier(days: int = 14, sample: int = 200, target_precision: float = None):
+    """
+    Set the classifier threshold from agreement with the LLM tagger on recently stored items.
+    Stored tags may themselves come from the classifier, so the sample is re-tagged with
+    TAGGING_PROMPT (through the completion cache) as the reference.
+    """
+    try:
+        target_precision = target_precision or Config.TAG_CLASSIFIER_TARGET_PRECISION
+        items = [item for item in Database().get_recent_items(days=days) if item.cleaned_text][:sample]
+        if not items:
+            print("No recent items with cleaned text to calibrate on.")
+            return None
+        texts = [item.cleaned_text for item in items]
+        create_cache_schema()
+
+        prompts = [TAGGING_PROMPT.format(text=budget_text(text, "tagging"), tags=Config.ai_tags) for text in texts]
+        responses = run_async(AIClient().get_completions_many(prompts))
+        labelled = [(row, set(normalize_tags(parse_tags(response)))) for row, response in enumerate(responses)
+                    if not isinstance(response, Exception)]
+
+        classifier = TagClassifier()
+        top, top_scores = classifier.top_tags([texts[row] for row, _ in labelled])
+        scores = top_scores[:, 0]
+        correct = np.array([normalize_tag(classifier.tags[indices[0]]) in tags for indices, (_, tags) in zip(top, labelled)])
+
+        threshold = calibrate_threshold(scores, correct, target_precision)
+        print(f"\nCalibrated on {len(labelled)} items from the last {days} days")
+        print(f"Top-tag agreement with the LLM tagger over all items: {correct.mean():.1%}")
+        if threshold is None:
+            print(f"No threshold reaches {target_precision:.0%} agreement; keeping the current setting.")
+            return None
+
+        covered = scores >= threshold
+        calibration = {
+            "model": classifier.embedding_model.model_name,
+            "min_score": threshold,
+            "target_precision": target_precision,
+            "precision": float(correct[covered].mean()),
+            "coverage": float(covered.mean()),
+            "samples": len(labelled),
+            "calibrated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        save_calibration(calibration)
+        print(f"Threshold {threshold:.3f}: {calibration['precision']:.1%} agreement, "
+              f"{calibration['coverage']:.1%} of items tagged locally")
+        print(f"Saved to {Config.TAG_CLASSIFIER_CALIBRATION_PATH}")
+        return calibration
+    except Exception as e:
+        logging.error(f"Tag classifier calibration failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Calibrate the local tag classifier threshold against the LLM tagger")
+    parser.add_argument("--days", type=int, default=14, help="Sample items stored in the last N days")
+    parser.add_argument("--sample", type=int, default=200, help="Maximum number of items to re-tag with the LLM")
+    parser.add_argument("--target-precision", type=float, default=None,
+                        help="Required top-tag agreement (defaults to TAG_CLASSIFIER_TARGET_PRECISION)")
+    args = parser.parse_args()
+    calibrate_tag_classifier(args.days, args.sample, args.target_precision)
@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, select, text
+from models.models import DBItem, DBPost, DBHotTopic
+from models.database import tags_filter
+from config import Config
+
+def dashboard_queries():
+    """The read paths indexed by migrations 0002 and 0003, paired with the index each should use"""
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    end = day.replace(hour=23, minute=59, second=59)
+    cutoff = datetime.now() - timedelta(days=30)
+    return [
+        ("get_news_data",
+         select(DBItem).where(DBItem.timestamp >= day, DBItem.timestamp < end).order_by(DBItem.timestamp.desc()),
+         "ix_items_timestamp"),
+        ("get_reports",
+         select(DBHotTopic).where(DBHotTopic.publication_date >= day, DBHotTopic.publication_date < end)
+         .order_by(DBHotTopic.publication_date.desc()),
+         "ix_hot_topics_publication_date"),
+        ("get_all_posts",
+         select(DBPost).where(DBPost.publication_date >= cutoff),
+         "ix_posts_publication_date"),
+        ("item by url",
+         select(DBItem).where(DBItem.url == "https://github.com/example/repo"),
+         "ix_items_url"),
+        ("items by tag",
+         select(DBItem).where(tags_filter(["large-language-models", "computer-vision"])),
+         "ix_items_content_tags"),
+    ]
+
+def bound_params(compiled) -> dict:
+    """
+    compiled.params run through the column types' bind processors, as Connection.execute would do.
+    exec_driver_sql passes values to the driver untouched, so a JSONB list would otherwise be sent as text[].
+    """
+    params = {}
+    for name, value in compiled.params.items():
+        processor = compiled.binds[name].type.dialect_impl(compiled.dialect).bind_processor(compiled.dialect)
+        params[name] = processor(value) if processor else value
+    return params
+
+def plan_indexes(plan: dict) -> set:
+    """Every index name referenced anywhere in an EXPLAIN (FORMAT JSON) plan tree"""
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= plan_indexes(child)
+    return names
+
+def check_query_plans(natural: bool = False) -> bool:
+    """EXPLAIN each dashboard query and report whether the planner uses the expected index"""
+    try:
+        engine = create_engine(Config.get_database_url())
+        passed = True
+        with engine.begin() as conn:
+            if not natural:
+                # Small tables are always cheapest to scan sequentially; this asks whether the index is usable
+                conn.execute(text("SET LOCAL enable_seqscan = off"))
+            for name, query, index in dashboard_queries():
+                compiled = query.compile(dialect=conn.dialect)
+                plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", bound_params(compiled)).scalar()[0]["Plan"]
+                used = plan_indexes(plan)
+                ok = index in used
+                passed &= ok
+                print(f"{'OK  ' if ok else 'FAIL'} {name:<15} {plan['Node Type']:<20} expected {index}, plan uses {sorted(used) or 'no index'}")
+        return passed
+    except Exception as e:
+        logging.error(f"Query plan check failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that dashboard queries are served by their indexes")
+    parser.add_argument("--natural", action="store_true", help="Keep sequential scans enabled and show the planner's own choice")
+    args = parser.parse_args()
+    sys.exit(0 if check_query_plans(args.natural) else 1)
@@ -1,7 +1,7 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from models.database import Database
+from models.database import session_scope
 from models.models import DBItem, DBPost, DBHotTopic
 import logging
 from datetime import datetime
@@ -9,10 +9,10 @@ from datetime import datetime
 def print_database_summary():
     """Display comprehensive information about all items in the database."""
     try:
-        db = Database()
-        items = db.session.query(DBItem).order_by(DBItem.timestamp.desc()).all()
-        posts = db.session.query(DBPost).order_by(DBPost.publication_date.desc()).all()
-        hot_topics = db.session.query(DBHotTopic).order_by(DBHotTopic.publication_date.desc()).all()
+        with session_scope() as session:
+            items = session.query(DBItem).order_by(DBItem.timestamp.desc()).all()
+            posts = session.query(DBPost).order_by(DBPost.publication_date.desc()).all()
+            hot_topics = session.query(DBHotTopic).order_by(DBHotTopic.publication_date.desc()).all()
         
         if not items and not hot_topics:
             print("\nDatabase is empty.")
@@ -86,9 +86,6 @@ def print_database_summary():
     except Exception as e:
         logging.error(f"Failed to print database summary: {e}")
         raise
-    finally:
-        if 'db' in locals():
-            db.session.close()
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
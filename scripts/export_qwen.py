@@ -0,0 +1,35 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import logging
+import torch
+from config import Config
+from utils.qwen import merge_lora, quantize_int8, INT8_WEIGHTS_FILE
+
+def export_merged_model(output_dir: str, int8: bool = False):
+    """Merge the LoRA adapter into the base model once and save the result for workers to load."""
+    try:
+        from transformers import AutoTokenizer
+        logging.info("Merging LoRA adapter into the base model...")
+        model = merge_lora('cpu')
+        model.save_pretrained(output_dir, safe_serialization=True)
+        AutoTokenizer.from_pretrained(Config.QWEN_BASE_MODEL).save_pretrained(output_dir)
+        logging.info(f"Merged model saved to {output_dir}")
+
+        if int8:
+            logging.info("Quantizing Linear layers to int8...")
+            quantized = quantize_int8(model.float())
+            torch.save(quantized, os.path.join(output_dir, INT8_WEIGHTS_FILE))
+            logging.info(f"Int8 model saved to {os.path.join(output_dir, INT8_WEIGHTS_FILE)}")
+    except Exception as e:
+        logging.error(f"Error exporting merged model: {e}")
+        raise
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Export the merged Qwen post-titling model")
+    parser.add_argument("--output-dir", default=Config.QWEN_MERGED_MODEL_PATH)
+    parser.add_argument("--int8", action="store_true", help="Also save a dynamically quantized int8 copy for CPU workers")
+    args = parser.parse_args()
+    export_merged_model(args.output_dir, args.int8)
@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import subprocess
+import logging
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def profile_imports(module: str, top: int = 25):
+    """Run `python -X importtime` on a module and print the slowest imports by cumulative time."""
+    try:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True
+        )
+        rows = []
+        for line in result.stderr.splitlines():
+            # Format: "import time: self [us] | cumulative | imported package"
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+        if result.returncode != 0:
+            logging.warning(f"Importing {module} failed; timings cover the imports before the error")
+            print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "")
+
+        total = max((cumulative for cumulative, _, name in rows if name.strip() == module), default=0)
+        print("\n" + "=" * 100)
+        print(f"IMPORT TIME PROFILE: {module}".center(100))
+        print("=" * 100)
+        print(f"\nTotal: {total / 1000:.1f} ms across {len(rows)} modules\n")
+        print(f"{'cumulative ms':>14} {'self ms':>10}  module")
+        print("-" * 100)
+        for cumulative, self_us, name in sorted(rows, reverse=True)[:top]:
+            print(f"{cumulative / 1000:>14.1f} {self_us / 1000:>10.1f}  {name}")
+    except Exception as e:
+        logging.error(f"Failed to profile imports: {e}")
+        raise
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Import-time profile of an entry point")
+    parser.add_argument("module", nargs="?", default="main", help="Module to import, e.g. main or app")
+    parser.add_argument("--top", type=int, default=25, help="Number of slowest imports to show")
+    args = parser.parse_args()
+    profile_imports(args.module, args.top)
@@ -0,0 +1,13 @@
+import sys
+import os
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Database on a fresh SQLite file with the current schema"""
+    from models.database import Database, create_schema
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    create_schema(url)
+    return Database(url)
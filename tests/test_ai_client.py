@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+import httpx
+import openai
+import pytest
+from config import Config
+from utils import ai_client
+from utils.ai_client import AIClient, json_response_format
+
+SCHEMA = {"type": "object", "properties": {}}
+
+
+def completion(content):
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def bad_request(message):
+    request = httpx.Request("POST", "https://example.openai.azure.com")
+    return openai.BadRequestError(message, response=httpx.Response(400, request=request), body=None)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """AIClient without a cache whose Azure calls are answered by the test's `respond` function"""
+    calls = []
+    llm = AIClient.__new__(AIClient)
+    llm.config = Config
+    llm.cache = None
+    monkeypatch.setattr(AIClient, "azure_client", property(lambda self: SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: calls.append(kwargs) or kwargs))
+    )))
+
+    async def run(call, tokens=1):
+        return llm.respond(call())
+    monkeypatch.setattr(ai_client.AZURE_LIMITER, "run", run)
+    monkeypatch.setattr(ai_client, "_json_schema_rejected", False)
+    llm.calls = calls
+    return llm
+
+
+def test_json_object_is_the_default_mode(monkeypatch):
+    monkeypatch.setattr(ai_client, "_json_schema_rejected", False)
+    assert json_response_format("x", SCHEMA) == {"type": "json_object"}
+
+
+def test_rejected_json_schema_falls_back_to_json_object(client, monkeypatch):
+    monkeypatch.setattr(Config, "LLM_JSON_MODE", "json_schema")
+
+    def respond(kwargs):
+        if kwargs["response_format"]["type"] == "json_schema":
+            raise bad_request("response_format of type 'json_schema' is not supported with this API version")
+        return completion('{"ok": true}')
+    client.respond = respond
+
+    result = asyncio.run(client.get_completion("prompt", "deployment", response_format=json_response_format("x", SCHEMA)))
+    assert result == '{"ok": true}'
+    assert [call["response_format"]["type"] for call in client.calls] == ["json_schema", "json_object"]
+    # Later prompts skip the doomed json_schema attempt
+    assert json_response_format("x", SCHEMA) == {"type": "json_object"}
+
+
+def test_other_bad_requests_are_raised(client, monkeypatch):
+    monkeypatch.setattr(Config, "LLM_JSON_MODE", "json_schema")
+
+    def respond(kwargs):
+        raise bad_request("content filtered")
+    client.respond = respond
+
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(client.get_completion("prompt", "deployment", response_format=json_response_format("x", SCHEMA)))
+    assert len(client.calls) == 1
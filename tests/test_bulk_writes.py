@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+from models.models import DBHotTopic, DBItem, DBMinHashBand, HotTopic, Item, Post
+from utils.fingerprint import text_hash
+from utils.minhash import band_keys, signature
+
+TEXT = " ".join(f"word{i}" for i in range(40))
+
+
+def count(database, model, *criteria):
+    with database.session_scope() as session:
+        return session.query(model).filter(*criteria).count()
+
+
+def make_post(text, **fields):
+    return Post(content_snippet=text, content_hash=text_hash(text), publication_date=datetime.now(), **fields)
+
+
+def test_save_posts_counts_only_inserted_rows(database):
+    assert database.save_posts([]) == 0
+    assert database.save_posts([make_post("one"), make_post("two")]) == 2
+    assert database.save_posts([make_post("two"), make_post("three")]) == 1
+    assert len(database.get_all_posts()) == 3
+
+
+def test_minhash_bands_are_written_only_for_inserted_posts(database):
+    stored = make_post(TEXT, minhash=signature(TEXT).tobytes())
+    database.save_posts([stored])
+    bands = count(database, DBMinHashBand, DBMinHashBand.row_id == stored.id)
+    assert bands > 0
+    duplicate = make_post(TEXT, minhash=signature(TEXT).tobytes())
+    database.save_posts([duplicate])
+    assert count(database, DBMinHashBand, DBMinHashBand.row_id == duplicate.id) == 0
+    assert count(database, DBMinHashBand) == bands
+
+
+def test_save_items_upserts_in_place_and_replaces_bands(database):
+    now = datetime.now()
+    item = Item(url="https://example.com/a", content_snippet="readme", timestamp=now, minhash=signature(TEXT).tobytes())
+    database.save_items([item])
+    other = TEXT.replace("word1 ", "changed ")
+    database.save_items([Item(id=item.id, url=item.url, content_snippet="readme", timestamp=now,
+                              summary="Summary", minhash=signature(other).tobytes())])
+    assert count(database, DBItem) == 1
+    assert [stored.summary for stored in database.get_recent_items()] == ["Summary"]
+    with database.session_scope() as session:
+        keys = {row.band_key for row in session.query(DBMinHashBand).filter(DBMinHashBand.row_id == item.id)}
+    assert keys == set(band_keys(signature(other)))
+
+
+def test_save_hot_topics_upserts_by_id(database):
+    topic = HotTopic(snippet="First take", publication_date=datetime.now() - timedelta(hours=1))
+    database.save_hot_topics([topic])
+    database.save_hot_topics([HotTopic(id=topic.id, snippet="Revised take", publication_date=datetime.now()),
+                              HotTopic(snippet="Another topic", publication_date=datetime.now())])
+    assert count(database, DBHotTopic) == 2
+    assert count(database, DBHotTopic, DBHotTopic.snippet == "Revised take") == 1
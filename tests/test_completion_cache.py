@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from models.models import Base, DBCompletion
+from utils import ai_client
+from utils.ai_client import CompletionCache
+
+
+@pytest.fixture
+def cache_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'cache.db'}"
+    Base.metadata.create_all(ai_client.get_cache_engine(url), tables=[DBCompletion.__table__])
+    return url
+
+
+def backdate(cache, hours):
+    with cache.Session() as session:
+        session.execute(update(DBCompletion).values(created_at=datetime.now() - timedelta(hours=hours)))
+        session.commit()
+
+
+def test_construction_does_not_touch_the_database(monkeypatch):
+    engines = []
+    monkeypatch.setattr(ai_client, "get_cache_engine", lambda url: engines.append(url))
+    CompletionCache("sqlite:////nonexistent/dir/cache.db", ttl_hours=1, max_entries=10)
+    assert engines == []
+
+
+def test_hit_and_miss_are_keyed_by_deployment_and_prompt(cache_url):
+    cache = CompletionCache(cache_url, ttl_hours=1, max_entries=10)
+    assert cache.get("gpt", "prompt") is None
+    cache.put("gpt", "prompt", "answer")
+    assert cache.get("gpt", "prompt") == "answer"
+    assert cache.get("other-deployment", "prompt") is None
+    assert cache.get("gpt", "other prompt") is None
+    assert cache.stats() == {"hits": 1, "misses": 3}
+
+
+def test_put_replaces_the_cached_completion(cache_url):
+    cache = CompletionCache(cache_url, ttl_hours=1, max_entries=10)
+    cache.put("gpt", "prompt", "rejected answer")
+    cache.put("gpt", "prompt", "fresh answer")
+    assert cache.get("gpt", "prompt") == "fresh answer"
+
+
+def test_expired_entries_miss_and_are_evicted(cache_url):
+    cache = CompletionCache(cache_url, ttl_hours=1, max_entries=10)
+    cache.put("gpt", "prompt", "answer")
+    backdate(cache, hours=2)
+    assert cache.get("gpt", "prompt") is None
+    cache.evict()
+    with cache.Session() as session:
+        assert session.query(DBCompletion).count() == 0
+
+
+def test_eviction_keeps_the_most_recently_used_entries(cache_url):
+    cache = CompletionCache(cache_url, ttl_hours=1, max_entries=2)
+    for prompt in ("a", "b", "c"):
+        cache.put("gpt", prompt, prompt.upper())
+    with cache.Session() as session:
+        session.execute(update(DBCompletion).where(DBCompletion.key == cache.make_key("gpt", "a"))
+                        .values(last_accessed=datetime.now() + timedelta(minutes=1)))
+        session.commit()
+    cache.evict()
+    assert cache.get("gpt", "a") == "A"
+    assert cache.get("gpt", "c") == "C"
+    assert cache.get("gpt", "b") is None
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from config import Config
+from models.models import Base, DBEmbedding
+from utils import ai_client
+from utils.ai_client import EmbeddingCache, VoyageEmbeddingModel
+
+
+@pytest.fixture
+def cache(tmp_path):
+    url = f"sqlite:///{tmp_path / 'cache.db'}"
+    Base.metadata.create_all(ai_client.get_cache_engine(url), tables=[DBEmbedding.__table__])
+    return EmbeddingCache(url, "float16")
+
+
+@pytest.fixture
+def model(monkeypatch, cache):
+    """Voyage model on the test cache whose API calls return one distinct vector per text"""
+    monkeypatch.setattr(Config, "LLM_CACHE_BACKEND", "none")
+    voyage = VoyageEmbeddingModel()
+    voyage.cache = cache
+    voyage.embedded = []
+
+    def encode_sync(texts):
+        voyage.embedded.append(list(texts))
+        return np.array([[len(text), 1.0, 0.5] for text in texts], dtype=np.float32)
+    voyage._encode_sync = encode_sync
+    return voyage
+
+
+def test_get_many_returns_only_stored_keys_for_the_model(cache):
+    keys = [EmbeddingCache.make_key(text) for text in ("a", "b")]
+    cache.put_many("voyage", keys[:1], np.array([[1.0, 2.0]]))
+    assert cache.get_many("voyage", keys) == {keys[0]: np.array([1.0, 2.0], dtype=np.float16).tobytes()}
+    assert cache.get_many("other-model", keys) == {}
+    assert cache.stats() == {"hits": 1, "misses": 3}
+
+
+def test_put_many_tolerates_rows_stored_by_another_run(cache):
+    key = EmbeddingCache.make_key("a")
+    cache.put_many("voyage", [key], np.array([[1.0, 2.0]]))
+    cache.put_many("voyage", [key, EmbeddingCache.make_key("b")], np.array([[1.0, 2.0], [3.0, 4.0]]))
+    assert len(cache.get_many("voyage", [key, EmbeddingCache.make_key("b")])) == 2
+
+
+def test_encode_embeds_only_misses_and_keeps_input_order(model):
+    first = model.encode(["aa", "b"])
+    second = model.encode(["ccc", "aa", "b", "ccc"])
+    assert model.embedded == [["aa", "b"], ["ccc"]]
+    assert np.allclose(second[1:3], first)
+    assert np.allclose(second[[0, 3], 0], 3)
+
+
+def test_encode_of_no_texts_has_the_model_dimension(model):
+    assert model.encode([]).shape == (0, model.dimension)
+    assert model.embedded == []
+
+
+def test_cache_lookup_failure_embeds_everything(model, monkeypatch):
+    def broken(*args):
+        raise RuntimeError("database down")
+    monkeypatch.setattr(model.cache, "get_many", broken)
+    assert model.encode(["aa", "b"]).shape == (2, 3)
+    assert model.embedded == [["aa", "b"]]
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+from agents.filter import filter_duplicates_posts
+from models.models import Item, Post, State
+from utils.fingerprint import text_hash
+
+
+def stored_items(database):
+    from models.models import DBItem
+    with database.session_scope() as session:
+        return {row.id: row.to_item() for row in session.query(DBItem).all()}
+
+
+def test_posts_repeated_in_the_run_or_already_stored_are_dropped(database):
+    filter_duplicates_posts(State(posts=[Post(content_snippet="Old news", publication_date=datetime.now())]), database)
+    state = State(posts=[
+        Post(content_snippet="Fresh news", publication_date=datetime.now()),
+        Post(content_snippet="  fresh   NEWS ", publication_date=datetime.now()),
+        Post(content_snippet="old news", publication_date=datetime.now()),
+    ])
+    state = filter_duplicates_posts(state, database)
+    assert [post.content_snippet for post in state.posts] == ["Fresh news"]
+    assert database.get_existing_post_hashes([text_hash("fresh news"), text_hash("other")]) == {text_hash("fresh news")}
+
+
+def test_same_content_on_the_same_day_updates_the_stored_item(database):
+    morning = datetime.now().replace(hour=8)
+    first = Item(url="https://example.com/a", content_snippet="Same README", timestamp=morning, title="Old")
+    database.save_items([first])
+    again = Item(url="https://example.com/a", content_snippet="Same README", timestamp=morning.replace(hour=20), title="New")
+    database.save_items([again])
+    assert again.id == first.id
+    assert [item.title for item in stored_items(database).values()] == ["New"]
+
+
+def test_same_content_on_a_later_day_gets_its_own_row(database):
+    today = datetime.now()
+    database.save_items([Item(url="https://example.com/a", content_snippet="Trending repo", timestamp=today - timedelta(days=1))])
+    database.save_items([Item(url="https://example.com/a", content_snippet="Trending repo", timestamp=today)])
+    days = sorted(item.timestamp.date() for item in stored_items(database).values())
+    assert days == [(today - timedelta(days=1)).date(), today.date()]
+
+
+def test_duplicates_within_one_batch_are_saved_once(database):
+    now = datetime.now()
+    database.save_items([
+        Item(url="https://example.com/a", content_snippet="Same text", timestamp=now),
+        Item(url="https://example.com/b", content_snippet="same  TEXT", timestamp=now),
+    ])
+    assert len(stored_items(database)) == 1
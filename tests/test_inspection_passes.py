@@ -0,0 +1,60 @@
+import pytest
+from agents import inspector
+from agents.inspector import VERDICT_FIELDS, inspect_content
+from models.models import Item, State
+
+URL = "https://example.com/article"
+
+
+def make_item(**fields):
+    defaults = dict(url=URL, content_snippet="text", cleaned_text="text", fingerprint="f" * 64, title="A title",
+                    content_tags=["llm"], summary="A summary", news_snippet=f"A snippet {URL}")
+    return Item(**{**defaults, **fields})
+
+
+@pytest.fixture
+def inspected(monkeypatch, database):
+    """Routes the inspector to the test database and answers every model inspection with `verdict`"""
+    calls = []
+    monkeypatch.setattr(inspector, "Database", lambda: database)
+
+    def validate_items(llm, items):
+        calls.append([item.id for item in items])
+        return [dict(inspected.verdict) for _ in items]
+    monkeypatch.setattr(inspector, "validate_items", validate_items)
+    inspected.verdict = {**{field: True for field in VERDICT_FIELDS}, "issues": {}}
+    inspected.calls = calls
+    return inspected
+
+
+def test_outputs_that_passed_in_an_earlier_run_are_not_inspected_again(inspected):
+    inspect_content(State(items=[make_item()]), llm=None)
+    assert len(inspected.calls) == 1
+
+    # A later run reuses the same outputs for the same content under a new item id
+    state = inspect_content(State(items=[make_item()]), llm=None)
+    assert len(inspected.calls) == 1
+    assert state.next_step == "continue"
+
+
+def test_changed_outputs_or_content_are_inspected(inspected):
+    inspect_content(State(items=[make_item()]), llm=None)
+    inspect_content(State(items=[make_item(summary="Another summary")]), llm=None)
+    inspect_content(State(items=[make_item(fingerprint="e" * 64)]), llm=None)
+    assert len(inspected.calls) == 3
+
+
+def test_failed_verdicts_are_not_stored(inspected, monkeypatch):
+    monkeypatch.setattr(inspector.Config, "INSPECTION_MAX_RETRIES", 0)
+    inspected.verdict = {**inspected.verdict, "summary_valid": False}
+    inspect_content(State(items=[make_item()]), llm=None)
+    inspect_content(State(items=[make_item()]), llm=None)
+    assert len(inspected.calls) == 2
+
+
+def test_unavailable_store_falls_back_to_inspecting(inspected, monkeypatch):
+    def broken():
+        raise RuntimeError("database down")
+    monkeypatch.setattr(inspector, "Database", broken)
+    assert inspect_content(State(items=[make_item()]), llm=None).next_step == "continue"
+    assert len(inspected.calls) == 1
@@ -0,0 +1,75 @@
+import json
+import pytest
+from agents.inspector import ISSUE_FIELDS, VERDICT_FIELDS, parse_batch_response, parse_validation_response, validate_verdict
+from models.models import Item
+
+VALID = {"title_valid": True, "tags_valid": False, "summary_valid": True, "snippet_valid": True,
+         "issues": {"tags": "Tags outside the allowed list"}}
+
+
+def make_items(*ids):
+    return [Item(id=item_id, url=f"https://example.com/{item_id}", content_snippet="text") for item_id in ids]
+
+
+def test_validate_verdict_normalizes_issues():
+    verdict = validate_verdict(VALID)
+    assert {field: verdict[field] for field in VERDICT_FIELDS} == {
+        "title_valid": True, "tags_valid": False, "summary_valid": True, "snippet_valid": True
+    }
+    assert verdict["issues"] == {"title": None, "tags": "Tags outside the allowed list", "summary": None, "snippet": None}
+
+
+def test_validate_verdict_fills_missing_or_malformed_issues():
+    verdict = validate_verdict({**VALID, "issues": "none"})
+    assert verdict["issues"] == {field: None for field in ISSUE_FIELDS}
+    assert validate_verdict({field: True for field in VERDICT_FIELDS})["issues"] == {field: None for field in ISSUE_FIELDS}
+
+
+def test_validate_verdict_rejects_schema_violations():
+    assert validate_verdict(None) is None
+    assert validate_verdict([VALID]) is None
+    assert validate_verdict({**VALID, "title_valid": "true"}) is None
+    assert validate_verdict({**VALID, "snippet_valid": 1}) is None
+    missing = dict(VALID)
+    del missing["summary_valid"]
+    assert validate_verdict(missing) is None
+
+
+def test_parse_validation_response_strips_fences():
+    assert parse_validation_response("```json\n" + json.dumps(VALID) + "\n```")["tags_valid"] is False
+    assert parse_validation_response("not json") is None
+    assert parse_validation_response(json.dumps({"title_valid": True})) is None
+
+
+@pytest.mark.parametrize("content", [None, "", "   "])
+def test_refusals_without_content_are_unparseable(content):
+    # Strict structured output returns content=None when the model refuses
+    assert parse_validation_response(content) is None
+    assert parse_batch_response(content, make_items("a")) == {}
+
+
+def test_parse_batch_response_maps_verdicts_to_requested_items():
+    items = make_items("a", "b")
+    response = json.dumps({"verdicts": [{**VALID, "item_id": "b"}, {**VALID, "item_id": "a", "tags_valid": True}]})
+    verdicts = parse_batch_response(response, items)
+    assert set(verdicts) == {"a", "b"}
+    assert verdicts["a"]["tags_valid"] is True
+    assert verdicts["b"]["tags_valid"] is False
+
+
+def test_parse_batch_response_leaves_out_unknown_and_malformed_verdicts():
+    items = make_items("a", "b", "c")
+    response = "```json\n" + json.dumps({"verdicts": [
+        {**VALID, "item_id": "a"},
+        {**VALID, "item_id": "zzz"},
+        {**VALID, "item_id": "b", "title_valid": None},
+        "garbage",
+    ]}) + "\n```"
+    assert set(parse_batch_response(response, items)) == {"a"}
+
+
+def test_parse_batch_response_accepts_a_bare_list_and_survives_bad_json():
+    items = make_items("a")
+    assert set(parse_batch_response(json.dumps([{**VALID, "item_id": "a"}]), items)) == {"a"}
+    assert parse_batch_response("{not json", items) == {}
+    assert parse_batch_response(json.dumps({"verdicts": "none"}), items) == {}
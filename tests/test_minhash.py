@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+import numpy as np
+from config import Config
+from utils.minhash import LSHIndex, band_keys, from_bytes, signature, similarity
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEXT = "the quick brown fox jumps over the lazy dog"
+
+
+def words(start, stop):
+    return " ".join(f"w{i}" for i in range(start, stop))
+
+
+def test_signature_is_fixed_across_runs():
+    # Signatures are persisted, so the permutations must not depend on the process
+    sig = signature(TEXT)
+    assert sig.dtype == np.uint32
+    assert len(sig) == Config.MINHASH_NUM_PERM
+    assert sig[:4].tolist() == [216479869, 3431672, 87459843, 292334801]
+    other_process = subprocess.run(
+        [sys.executable, "-c", f"from utils.minhash import signature; print(signature({TEXT!r}).tobytes().hex())"],
+        capture_output=True, text=True, check=True, cwd=ROOT
+    )
+    assert other_process.stdout.strip() == sig.tobytes().hex()
+
+
+def test_signature_round_trips_through_bytes():
+    sig = signature(TEXT)
+    assert np.array_equal(from_bytes(sig.tobytes()), sig)
+
+
+def test_case_and_punctuation_do_not_change_the_signature():
+    assert np.array_equal(signature(TEXT), signature("The quick, brown fox -- jumps over the LAZY dog!"))
+
+
+def test_too_short_texts_have_no_signature():
+    assert signature("") is None
+    assert signature(None) is None
+    assert signature("!!! ---") is None
+    assert signature(words(0, Config.MINHASH_MIN_TOKENS - 1)) is None
+    assert signature(words(0, Config.MINHASH_MIN_TOKENS)) is not None
+
+
+def test_similarity_estimates_jaccard_of_known_overlaps():
+    # 98 shingles each, 48 shared: Jaccard = 48 / 148
+    first, second = signature(words(0, 100)), signature(words(50, 150))
+    assert abs(similarity(first, second) - 48 / 148) < 0.15
+    assert similarity(first, first) == 1.0
+    assert similarity(first, signature(words(1000, 1100))) < 0.1
+
+
+def test_band_keys_bucket_each_band_separately():
+    sig = signature(words(0, 100))
+    keys = band_keys(sig)
+    assert len(keys) == Config.MINHASH_BANDS
+    assert keys == band_keys(sig.copy())
+
+    rows = len(sig) // Config.MINHASH_BANDS
+    changed = sig.copy()
+    changed[3 * rows] ^= 1
+    changed_keys = band_keys(changed)
+    assert [i for i, (a, b) in enumerate(zip(keys, changed_keys)) if a != b] == [3]
+
+    # Identical band contents in different positions still land in different buckets
+    assert len(set(band_keys(np.zeros(Config.MINHASH_NUM_PERM, dtype=np.uint32)))) == Config.MINHASH_BANDS
+
+
+def test_lsh_index_returns_matches_above_threshold_best_first():
+    index = LSHIndex()
+    base = words(0, 200)
+    index.add("same", signature(base))
+    index.add("close", signature(base + " " + words(200, 210)))
+    index.add("unrelated", signature(words(5000, 5200)))
+    assert index.query(signature(base), threshold=0.8) == ["same", "close"]
+    assert index.query(signature(words(9000, 9200)), threshold=0.8) == []
@@ -0,0 +1,31 @@
+from agents.inspector import prevalidate
+from models.models import Item
+
+ARXIV_TITLE = "Scaling Laws for Neural Language Models Trained on Large Mixed Code and Text Corpora"
+
+
+def make_item(**fields):
+    url = "https://arxiv.org/abs/2401.00001"
+    defaults = dict(url=url, content_snippet="text", title="Short title", content_tags=["llm"],
+                    summary="A summary", news_snippet=f"A snippet {url}")
+    return Item(**{**defaults, **fields})
+
+
+def test_clean_item_goes_to_the_model():
+    assert prevalidate(make_item()) == (None, [])
+
+
+def test_long_crawler_titles_are_not_rejected():
+    assert prevalidate(make_item(title=ARXIV_TITLE)) == (None, [])
+
+
+def test_long_generated_titles_are_rejected():
+    verdict, fired = prevalidate(make_item(title=ARXIV_TITLE, title_generated=True))
+    assert fired == ["title_length"]
+    assert verdict["title_valid"] is False
+    assert verdict["tags_valid"] and verdict["summary_valid"] and verdict["snippet_valid"]
+
+
+def test_empty_titles_are_rejected_regardless_of_origin():
+    assert prevalidate(make_item(title="  "))[1] == ["title_length"]
+    assert prevalidate(make_item(title="", title_generated=True))[1] == ["title_length"]
@@ -0,0 +1,53 @@
+import json
+import pytest
+from agents.process import process_and_tag
+from config import Config
+from models.models import Item, State
+
+
+class RecordingLLM:
+    """Answers every prompt with `content` and records how each batch was requested"""
+
+    def __init__(self, content):
+        self.content = content
+        self.calls = []
+
+    async def get_completions_many(self, prompts, use_cache=True, response_format=None):
+        self.calls.append({"prompts": len(prompts), "use_cache": use_cache, "response_format": response_format})
+        return [self.content] * len(prompts)
+
+
+def rejected_item(**fields):
+    # An item whose outputs were cleared by the inspector: cleaned_text is already set
+    return Item(url="https://example.com/a", content_snippet="text", cleaned_text="Some article text", **fields)
+
+
+@pytest.fixture(autouse=True)
+def combined(monkeypatch):
+    monkeypatch.setattr(Config, "COMBINED_TAG_TITLE", True)
+
+
+def test_items_missing_title_and_tags_use_one_uncached_combined_call():
+    item = rejected_item(title=None, content_tags=None)
+    llm = RecordingLLM(json.dumps({"title": "New title", "tags": [Config.ai_tags[0]]}))
+    process_and_tag(State(items=[item]), llm)
+    assert [(call["prompts"], call["use_cache"]) for call in llm.calls] == [(1, False)]
+    assert llm.calls[0]["response_format"] is not None
+    assert item.title == "New title" and item.title_generated
+    assert item.content_tags == [Config.ai_tags[0].upper()]
+
+
+def test_unusable_combined_response_falls_back_to_separate_calls():
+    item = rejected_item(title=None, content_tags=None)
+    llm = RecordingLLM("not json")
+    process_and_tag(State(items=[item]), llm)
+    assert [(call["prompts"], call["use_cache"]) for call in llm.calls] == [(1, False), (2, False)]
+    assert item.title == "not json"
+
+
+def test_items_missing_only_tags_skip_the_combined_call():
+    item = rejected_item(title="Kept title", content_tags=None)
+    llm = RecordingLLM(Config.ai_tags[0])
+    process_and_tag(State(items=[item]), llm)
+    assert [(call["prompts"], call["use_cache"], call["response_format"]) for call in llm.calls] == [(1, False, None)]
+    assert item.title == "Kept title"
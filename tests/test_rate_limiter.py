@@ -0,0 +1,114 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from config import Config
+from utils.rate_limiter import AdaptiveLimiter
+
+
+class APIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+def make_limiter(max_concurrency=8, min_concurrency=1):
+    return AdaptiveLimiter("test", requests_per_minute=10_000, tokens_per_minute=1_000_000,
+                           max_concurrency=max_concurrency, min_concurrency=min_concurrency)
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(Config, "RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(Config, "RETRY_MAX_ATTEMPTS", 3)
+
+
+def test_throttling_halves_the_window_down_to_the_floor():
+    limiter = make_limiter(max_concurrency=8, min_concurrency=2)
+    for expected in (4, 2, 2):
+        limiter._record(APIError(429))
+        assert limiter.concurrency == expected
+    assert limiter.throttled == 3
+
+
+def test_success_grows_the_window_additively_up_to_the_maximum():
+    limiter = make_limiter(max_concurrency=8)
+    limiter._record(APIError(429))
+    limiter._record()
+    assert limiter.concurrency == pytest.approx(4.25)
+    for _ in range(200):
+        limiter._record()
+    assert limiter.concurrency == 8
+
+
+def test_retry_after_pauses_new_calls():
+    limiter = make_limiter()
+    limiter._record(APIError(429, {"retry-after-ms": "500"}))
+    assert 0.4 < limiter._try_acquire(1) <= 0.5
+    assert limiter.in_flight == 0
+
+
+def test_other_errors_leave_the_window_alone():
+    limiter = make_limiter()
+    limiter._record(APIError(500))
+    assert limiter.concurrency == 8 and limiter.throttled == 0
+
+
+def test_transient_failures_are_retried_and_release_their_slots():
+    limiter = make_limiter()
+    outcomes = [APIError(429), APIError(503), "ok"]
+
+    async def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    assert asyncio.run(limiter.run(call)) == "ok"
+    assert limiter.retried == 2 and limiter.in_flight == 0
+
+
+def test_permanent_failures_are_raised_at_once():
+    limiter = make_limiter()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        raise APIError(400)
+    with pytest.raises(APIError):
+        asyncio.run(limiter.run(call))
+    assert len(calls) == 1 and limiter.in_flight == 0
+
+
+def test_cancelled_calls_release_their_slot():
+    limiter = make_limiter(max_concurrency=1)
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(3600)
+        task = asyncio.create_task(limiter.run(hang))
+        await started.wait()
+        assert limiter.in_flight == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The single slot is free again, so the next call is scheduled immediately
+        return await asyncio.wait_for(limiter.run(lambda: asyncio.sleep(0, "next")), timeout=1)
+    assert asyncio.run(scenario()) == "next"
+    assert limiter.in_flight == 0
+
+
+def test_interrupted_sync_calls_release_their_slot():
+    limiter = make_limiter(max_concurrency=1)
+
+    def interrupted():
+        raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        limiter.run_sync(interrupted)
+    assert limiter.in_flight == 0
+    start = time.monotonic()
+    assert limiter.run_sync(lambda: "next") == "next"
+    assert time.monotonic() - start < 0.5
@@ -0,0 +1,70 @@
+from datetime import datetime
+import numpy as np
+import pytest
+from agents import dedup
+from agents.dedup import index_saved_items, remove_semantic_duplicates
+from config import Config
+from models.models import Item, State
+from utils.vector_index import VectorIndex
+
+# Orthogonal unit vectors: items on the same topic embed identically
+TOPIC_A = np.array([1.0, 0.0, 0.0])
+TOPIC_B = np.array([0.0, 1.0, 0.0])
+TOPIC_C = np.array([0.0, 0.0, 1.0])
+
+
+class FixedEmbeddings:
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def encode(self, texts):
+        return np.array([self.vectors[text.split("\n")[0]] for text in texts], dtype=np.float32)
+
+
+def make_item(title, url):
+    return Item(url=url, title=title, content_snippet="abstract", timestamp=datetime.now())
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """Novelty index holding an earlier version of page-1 and an article on topic B"""
+    index = VectorIndex()
+    index.add(["https://example.com/page-1", "https://example.com/story-b"], np.stack([TOPIC_A, TOPIC_B]), [datetime.now().timestamp()] * 2)
+    monkeypatch.setattr(dedup, "_novelty_index", index)
+    monkeypatch.setattr(Config, "SEMANTIC_DUPLICATE_THRESHOLD", 0.9)
+    return index
+
+
+def run(items, vectors):
+    return remove_semantic_duplicates(State(items=items), db=None, embedding_model=FixedEmbeddings(vectors)).items
+
+
+def test_same_url_hit_does_not_hide_a_duplicate_further_down(stored):
+    # The page's own earlier version is the best match; the second neighbour is a real duplicate
+    stored.add(["https://example.com/copy-of-page-1"], TOPIC_A[None, :], [datetime.now().timestamp()])
+    items = [make_item("updated", "https://example.com/page-1")]
+    assert run(items, {"updated": TOPIC_A}) == []
+
+
+def test_same_url_alone_is_an_update_not_a_duplicate(stored):
+    items = [make_item("updated", "https://example.com/page-1/")]
+    assert run(items, {"updated": TOPIC_A}) == items
+
+
+def test_duplicates_within_the_run_are_dropped(stored):
+    items = [make_item("first", "https://example.com/c1"), make_item("second", "https://example.com/c2")]
+    assert [item.title for item in run(items, {"first": TOPIC_C, "second": TOPIC_C})] == ["first"]
+
+
+def test_kept_items_enter_the_index_only_once_saved(stored):
+    items = [make_item("kept", "https://example.com/c1"), make_item("filtered later", "https://example.com/c2")]
+    kept = run(items, {"kept": TOPIC_C, "filtered later": (TOPIC_C + TOPIC_A) / np.sqrt(2)})
+    assert len(kept) == 2
+    assert len(stored) == 2
+
+    index_saved_items(kept[:1])
+    assert len(stored) == 3
+    assert stored.search(TOPIC_C[None, :])[1] == ["https://example.com/c1"]
+    # Pending embeddings are dropped once the save has been indexed
+    index_saved_items(kept)
+    assert len(stored) == 3
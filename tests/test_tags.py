@@ -0,0 +1,55 @@
+import pytest
+from config import Config
+from utils.tags import normalize_tag, normalize_tags
+
+
+@pytest.mark.parametrize("tag", [
+    "large-language-models",
+    "LARGE-LANGUAGE-MODELS",
+    "Large Language Models",
+    "  large_language_models ",
+    "#Large-Language-Models",
+    "# large  language\tmodels",
+])
+def test_spellings_of_one_tag_normalize_together(tag):
+    assert normalize_tag(tag) == "large-language-models"
+
+
+def test_config_tags_are_already_normalized():
+    assert [normalize_tag(tag) for tag in Config.ai_tags] == [tag.lower() for tag in Config.ai_tags]
+
+
+def test_normalize_tags_dedupes_in_first_seen_order():
+    assert normalize_tags(["ROBOTICS", "Computer Vision", "robotics", "", "  ", "#", 3]) == ["robotics", "computer-vision"]
+
+
+def test_normalize_tags_keeps_missing_tags_missing():
+    assert normalize_tags(None) is None
+    assert normalize_tags([]) == []
+
+
+def test_query_plan_params_serialize_jsonb_lists():
+    from sqlalchemy import select
+    from sqlalchemy.dialects import postgresql
+    from models.database import tags_filter
+    from models.models import DBItem
+    from scripts.check_query_plans import bound_params
+
+    compiled = select(DBItem.id).where(tags_filter(["Computer Vision"], match_all=True)).compile(dialect=postgresql.dialect())
+    assert "@>" in str(compiled)
+    assert list(bound_params(compiled).values()) == ['["computer-vision"]']
+
+
+def test_items_filter_by_normalized_tags_and_count_facets(database):
+    from datetime import datetime
+    from models.models import Item
+
+    now = datetime.now()
+    database.save_items([
+        Item(url="https://example.com/a", content_snippet="a", timestamp=now, content_tags=["Computer Vision", "ROBOTICS"]),
+        Item(url="https://example.com/b", content_snippet="b", timestamp=now, content_tags=["robotics"]),
+    ])
+    assert {item.url for item in database.get_items_by_tags(["#Robotics"])} == {"https://example.com/a", "https://example.com/b"}
+    assert [item.url for item in database.get_items_by_tags(["robotics", "computer-vision"], match_all=True)] == ["https://example.com/a"]
+    assert database.get_items_by_tags([]) == []
+    assert database.get_tag_facets(now.date()) == {"robotics": 2, "computer-vision": 1}
@@ -0,0 +1,106 @@
+import pytest
+from config import Config
+from utils import token_budget
+from utils.token_budget import budget_text, count_tokens, split_into_chunks, strip_markdown_boilerplate, truncate_to_tokens
+
+README = """# fastgraph ![build](https://img.shields.io/badge/build-passing-green)
+
+A graph database for <b>agents</b>.
+
+## Building agents with fastgraph
+
+Agents keep their memory in typed graphs.
+
+## Installation
+
+Works on Linux and macOS.
+
+```bash
+pip install fastgraph
+```
+
+## Usage
+
+```python
+import fastgraph
+graph = fastgraph.Graph()
+```
+
+```bash
+$ pip install fastgraph[cuda]
+git clone https://github.com/example/fastgraph
+```
+
+Docker images are published for every release.
+
+## Development
+
+The roadmap covers distributed queries.
+
+## License
+
+MIT
+"""
+
+SENTENCES = " ".join(f"Sentence number {i} talks about graphs." for i in range(60))
+
+
+def test_count_tokens_of_nothing_is_zero():
+    assert count_tokens("") == 0
+    assert count_tokens(None) == 0
+    assert count_tokens("hello world") > 0
+
+
+def test_boilerplate_sections_badges_and_html_are_dropped():
+    stripped = strip_markdown_boilerplate(README)
+    assert "shields.io" not in stripped and "<b>" not in stripped
+    assert "A graph database for agents." in stripped
+    assert "Works on Linux" not in stripped and "MIT" not in stripped
+
+
+def test_descriptive_sections_are_kept():
+    stripped = strip_markdown_boilerplate(README)
+    assert "Agents keep their memory in typed graphs." in stripped
+    assert "The roadmap covers distributed queries." in stripped
+
+
+def test_install_commands_are_dropped_only_as_whole_code_blocks():
+    stripped = strip_markdown_boilerplate(README)
+    assert "pip install" not in stripped and "git clone" not in stripped
+    assert "graph = fastgraph.Graph()" in stripped
+    # Prose that happens to start like a command is not an install snippet
+    assert "Docker images are published for every release." in stripped
+
+
+def test_readme_of_only_boilerplate_is_returned_unchanged():
+    text = "## License\n\nMIT"
+    assert strip_markdown_boilerplate(text) == text
+
+
+def test_truncate_keeps_short_text_and_caps_long_text():
+    assert truncate_to_tokens("Short text.", 100) == "Short text."
+    cut = truncate_to_tokens(SENTENCES, 50)
+    assert count_tokens(cut) <= 50
+    assert SENTENCES.startswith(cut)
+
+
+def test_budget_text_uses_the_prompt_budget(monkeypatch):
+    monkeypatch.setitem(Config.PROMPT_TOKEN_BUDGETS, "tagging", 20)
+    assert count_tokens(budget_text(SENTENCES, "tagging")) <= 20
+    assert budget_text(None, "tagging") is None
+    assert budget_text("", "tagging") == ""
+    with pytest.raises(KeyError):
+        budget_text(SENTENCES, "unknown prompt")
+
+
+def test_chunks_cover_every_sentence_within_the_budget():
+    chunks = split_into_chunks(SENTENCES, 40)
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 40 + 5 for chunk in chunks)
+    assert " ".join(chunks) == SENTENCES
+
+
+def test_character_estimate_without_tiktoken(monkeypatch):
+    monkeypatch.setattr(token_budget, "_encoding", None)
+    assert count_tokens("x" * 30) == 30 // Config.CHARS_PER_TOKEN + 1
+    assert count_tokens(truncate_to_tokens("y" * 300, 10)) == 10
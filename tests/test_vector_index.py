@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from utils import vector_index
+from utils.vector_index import VectorIndex
+
+
+def random_vectors(count, dim=16, seed=0):
+    return np.random.RandomState(seed).randn(count, dim).astype(np.float32)
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(vector_index, "BLOCK_ROWS", 4)
+
+
+def test_empty_index_finds_nothing():
+    scores, keys = VectorIndex(dim=16).search(random_vectors(2))
+    assert np.all(np.isneginf(scores))
+    assert keys == [None, None]
+
+
+def test_search_finds_each_vector_across_blocks(small_blocks):
+    vectors = random_vectors(11)
+    index = VectorIndex()
+    # Uneven additions so rows are split across partly filled blocks
+    for start, stop in [(0, 3), (3, 9), (9, 11)]:
+        index.add([f"k{i}" for i in range(start, stop)], vectors[start:stop], [float(i) for i in range(start, stop)])
+    assert len(index) == 11
+    assert index.sizes == [4, 4, 3]
+
+    scores, keys = index.search(vectors * 3.0)
+    assert keys == [f"k{i}" for i in range(11)]
+    assert np.allclose(scores, 1.0, atol=1e-5)
+
+
+def test_expire_drops_old_entries_and_keeps_the_rest_searchable(small_blocks):
+    vectors = random_vectors(10)
+    index = VectorIndex()
+    index.add([f"k{i}" for i in range(10)], vectors, [float(i) for i in range(10)])
+
+    index.expire(cutoff=6.0)
+    assert index.keys == ["k6", "k7", "k8", "k9"]
+    assert index.sizes == [4]
+    scores, keys = index.search(vectors[6:])
+    assert keys == ["k6", "k7", "k8", "k9"]
+    assert np.allclose(scores, 1.0, atol=1e-5)
+
+    # Expired vectors now match something else, never their own key
+    _, keys = index.search(vectors[:6])
+    assert not {f"k{i}" for i in range(6)} & set(keys)
+
+    index.add(["new"], vectors[:1], [20.0])
+    assert index.search(vectors[:1])[1] == ["new"]
+
+
+def test_search_across_the_default_block_boundary():
+    rows = vector_index.BLOCK_ROWS + 1
+    vectors = random_vectors(rows, dim=8, seed=1)
+    index = VectorIndex()
+    index.add([str(i) for i in range(rows)], vectors, [0.0] * rows)
+    assert index.sizes == [vector_index.BLOCK_ROWS, 1]
+    _, keys = index.search(vectors[[0, rows - 2, rows - 1]])
+    assert keys == ["0", str(rows - 2), str(rows - 1)]
+
+
+def test_top_k_returns_the_best_neighbours_in_order(small_blocks):
+    vectors = random_vectors(10)
+    index = VectorIndex()
+    index.add([f"k{i}" for i in range(10)], vectors, [0.0] * 10)
+    scores, keys = index.search_top_k(vectors[:3], 4)
+    assert scores.shape == (3, 4)
+    assert [row[0] for row in keys] == ["k0", "k1", "k2"]
+    assert np.all(np.diff(scores, axis=1) <= 0)
+
+    # Brute force over all rows agrees, across block boundaries
+    normalized = VectorIndex.normalize(vectors)
+    expected = np.sort(normalized[:3] @ normalized.T, axis=1)[:, ::-1][:, :4]
+    assert np.allclose(scores, expected, atol=1e-5)
+
+
+def test_top_k_pads_when_the_index_is_small():
+    vectors = random_vectors(2)
+    index = VectorIndex()
+    index.add(["a", "b"], vectors, [0.0, 0.0])
+    scores, keys = index.search_top_k(vectors[:1], 4)
+    assert keys[0][:2] == ["a", "b"] and keys[0][2:] == [None, None]
+    assert np.all(np.isneginf(scores[0, 2:]))
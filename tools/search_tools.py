@@ -1,8 +1,10 @@
 import os
-import requests
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from typing import Dict, Any
 import logging
 from dotenv import load_dotenv
+from utils.http_clients import get_sync_session
 
 load_dotenv()
 
@@ -10,7 +12,7 @@ class SearchTools:
     def __init__(self):
         self.api_key = os.getenv("GOOGLE_SEARCH_API_KEY")
         self.search_engine_id = os.getenv("GOOGLE_SEARCH_ENGINE_ID")
-        self.session = requests.Session()
+        self.session = get_sync_session()
 
     def google_search(self, query: str, **params) -> Dict[str, Any]:
         """
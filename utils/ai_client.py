@@ -1,17 +1,342 @@
-import httpx
-from openai import AsyncAzureOpenAI
+import asyncio
+import hashlib
+import json
+from openai import AsyncAzureOpenAI, BadRequestError
 from config import Config
 import logging
-from typing import List, Union
+import weakref
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Union
 import numpy as np
-import requests
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from models.models import Base, DBCompletion, DBEmbedding
+from models.database import get_engine
+from utils.http_clients import get_async_client, get_sync_session
+from utils.rate_limiter import AdaptiveLimiter
+
+
+def get_cache_database_url() -> Optional[str]:
+    """Database URL for the configured cache backend, or None when caching is disabled"""
+    backend = Config.LLM_CACHE_BACKEND.lower()
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        return f"sqlite:///{Config.LLM_CACHE_SQLITE_PATH}"
+    return Config.get_database_url()
+
+
+def get_cache_engine(database_url: str):
+    """The process-wide engine for the cache database; on Postgres this is the pipeline's own pool"""
+    return get_engine(database_url)
+
+
+def create_cache_schema():
+    """Create missing cache tables; needed for the separate SQLite cache file, a no-op on a migrated database"""
+    database_url = get_cache_database_url()
+    if database_url is not None:
+        Base.metadata.create_all(get_cache_engine(database_url), tables=[DBCompletion.__table__, DBEmbedding.__table__])
+
+
+class CompletionCache:
+    """Content-addressed cache of LLM completions keyed by (deployment, prompt)"""
+
+    def __init__(self, database_url: str, ttl_hours: int, max_entries: int):
+        self.database_url = database_url
+        self._sessions = None
+        self.ttl = timedelta(hours=ttl_hours)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def Session(self) -> sessionmaker:
+        """Session factory, bound on first use so building an AIClient at import time touches no database"""
+        if self._sessions is None:
+            self._sessions = sessionmaker(bind=get_cache_engine(self.database_url))
+        return self._sessions
+
+    @classmethod
+    def from_config(cls) -> Optional['CompletionCache']:
+        """Build the cache for the configured backend, or None when caching is disabled"""
+        database_url = get_cache_database_url()
+        if database_url is None:
+            return None
+        try:
+            cache = cls(database_url, Config.LLM_CACHE_TTL_HOURS, Config.LLM_CACHE_MAX_ENTRIES)
+            logging.info(f"LLM completion cache enabled ({Config.LLM_CACHE_BACKEND})")
+            return cache
+        except Exception as e:
+            logging.warning(f"LLM completion cache unavailable, continuing without it: {e}")
+            return None
+
+    @staticmethod
+    def make_key(model: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        key = self.make_key(model, prompt)
+        now = datetime.now()
+        with self.Session() as session:
+            entry = session.get(DBCompletion, key)
+            if entry is None or entry.created_at < now - self.ttl:
+                self.misses += 1
+                return None
+            entry.last_accessed = now
+            response = entry.response
+            session.commit()
+        self.hits += 1
+        return response
+
+    def put(self, model: str, prompt: str, response: str):
+        now = datetime.now()
+        with self.Session() as session:
+            session.merge(DBCompletion(
+                key=self.make_key(model, prompt),
+                model=model,
+                response=response,
+                created_at=now,
+                last_accessed=now,
+            ))
+            try:
+                session.commit()
+            except IntegrityError:
+                # A concurrent request stored the same prompt first
+                session.rollback()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones beyond max_entries (once per run from main)"""
+        with self.Session() as session:
+            session.execute(delete(DBCompletion).where(DBCompletion.created_at < datetime.now() - self.ttl))
+            overflow = (
+                select(DBCompletion.key)
+                .order_by(DBCompletion.last_accessed.desc())
+                .offset(self.max_entries)
+                .scalar_subquery()
+            )
+            session.execute(delete(DBCompletion).where(DBCompletion.key.in_(overflow)))
+            session.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class EmbeddingCache:
+    """Store of embedding vectors keyed by (model name, text hash)"""
+
+    QUERY_CHUNK = 1000
+
+    def __init__(self, database_url: str, dtype: str):
+        self.database_url = database_url
+        self._sessions = None
+        self.dtype = np.dtype(dtype)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def Session(self) -> sessionmaker:
+        """Session factory, bound on the first lookup like CompletionCache.Session"""
+        if self._sessions is None:
+            self._sessions = sessionmaker(bind=get_cache_engine(self.database_url))
+        return self._sessions
+
+    @classmethod
+    def from_config(cls) -> Optional['EmbeddingCache']:
+        """Build the store for the configured backend, or None when caching is disabled"""
+        database_url = get_cache_database_url()
+        if database_url is None:
+            return None
+        try:
+            return cls(database_url, Config.EMBEDDING_CACHE_DTYPE)
+        except Exception as e:
+            logging.warning(f"Embedding cache unavailable, continuing without it: {e}")
+            return None
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, keys: List[str]) -> Dict[str, bytes]:
+        """Return the raw vector bytes for every key that is already stored"""
+        found = {}
+        with self.Session() as session:
+            for start in range(0, len(keys), self.QUERY_CHUNK):
+                rows = session.execute(
+                    select(DBEmbedding.text_hash, DBEmbedding.vector).where(
+                        DBEmbedding.model == model,
+                        DBEmbedding.text_hash.in_(keys[start:start + self.QUERY_CHUNK])
+                    )
+                )
+                found.update({text_hash: vector for text_hash, vector in rows})
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, model: str, keys: List[str], vectors: np.ndarray):
+        now = datetime.now()
+        rows = [
+            DBEmbedding(model=model, text_hash=key, vector=vector.astype(self.dtype).tobytes(), created_at=now)
+            for key, vector in zip(keys, vectors)
+        ]
+        with self.Session() as session:
+            session.add_all(rows)
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another run stored some of these texts first; fall back to row-wise upserts
+                session.rollback()
+                for row in rows:
+                    session.merge(row)
+                session.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+VOYAGE_BASE_URL = "https://api.voyageai.com/v1"
+
+# Process-wide limiters shared by every AIClient and embedding model
+AZURE_LIMITER = AdaptiveLimiter(
+    "Azure OpenAI",
+    requests_per_minute=Config.AZURE_OPENAI_RPM,
+    tokens_per_minute=Config.AZURE_OPENAI_TPM,
+    max_concurrency=Config.LLM_MAX_CONCURRENCY
+)
+VOYAGE_LIMITER = AdaptiveLimiter(
+    "Voyage AI",
+    requests_per_minute=Config.VOYAGE_RPM,
+    tokens_per_minute=Config.VOYAGE_TPM,
+    max_concurrency=Config.VOYAGE_MAX_CONCURRENCY
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used to keep requests under the provider limits"""
+    return len(text) // Config.CHARS_PER_TOKEN + 1
+
+
+def plan_embedding_batches(texts: List[str], max_items: int, max_tokens: int) -> List[Tuple[int, int]]:
+    """Split texts into contiguous (start, end) ranges within the item and token limits"""
+    batches = []
+    start, tokens = 0, 0
+    for index, text in enumerate(texts):
+        text_tokens = estimate_tokens(text)
+        if index > start and (index - start >= max_items or tokens + text_tokens > max_tokens):
+            batches.append((start, index))
+            start, tokens = index, 0
+        tokens += text_tokens
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
+def _voyage_headers(api_key: str) -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+
+
+def _embed_batch_sync(texts: List[str], model: str, api_key: str) -> List[List[float]]:
+    """Embed one batch; the Voyage limiter retries it independently of the other batches"""
+    def post():
+        response = get_sync_session().post(
+            f"{VOYAGE_BASE_URL}/embeddings",
+            headers=_voyage_headers(api_key),
+            json={"input": texts, "model": model},
+            timeout=Config.VOYAGE_TIMEOUT
+        )
+        response.raise_for_status()
+        return response.json()
+
+    result = VOYAGE_LIMITER.run_sync(post, tokens=sum(estimate_tokens(text) for text in texts))
+    return [embedding["embedding"] for embedding in result["data"]]
+
+
+async def _embed_batch(texts: List[str], model: str, api_key: str) -> List[List[float]]:
+    """Async counterpart of _embed_batch_sync"""
+    async def post():
+        response = await get_async_client().post(
+            f"{VOYAGE_BASE_URL}/embeddings",
+            headers=_voyage_headers(api_key),
+            json={"input": texts, "model": model},
+            timeout=Config.VOYAGE_TIMEOUT
+        )
+        response.raise_for_status()
+        return response.json()
+
+    result = await VOYAGE_LIMITER.run(post, tokens=sum(estimate_tokens(text) for text in texts))
+    return [embedding["embedding"] for embedding in result["data"]]
+
+
+def embed_texts_sync(texts: List[str], model: str, api_key: str) -> np.ndarray:
+    """
+    Embed texts with Voyage AI in limit-aware batches sent from a bounded thread pool
+    :return: float32 matrix with one row per input text, in input order
+    """
+    batches = plan_embedding_batches(texts, Config.VOYAGE_MAX_BATCH_SIZE, Config.VOYAGE_MAX_BATCH_TOKENS)
+    embeddings = None
+    with ThreadPoolExecutor(max_workers=Config.VOYAGE_MAX_CONCURRENCY) as executor:
+        futures = {
+            executor.submit(_embed_batch_sync, texts[start:end], model, api_key): (start, end)
+            for start, end in batches
+        }
+        for future in as_completed(futures):
+            start, end = futures[future]
+            vectors = future.result()
+            if embeddings is None:
+                embeddings = np.empty((len(texts), len(vectors[0])), dtype=np.float32)
+            embeddings[start:end] = vectors
+    if embeddings is None:
+        return np.empty((0, 0), dtype=np.float32)
+    return embeddings
+
+
+async def embed_texts(texts: List[str], model: str, api_key: str) -> np.ndarray:
+    """Async counterpart of embed_texts_sync, bounding in-flight batches with a semaphore"""
+    batches = plan_embedding_batches(texts, Config.VOYAGE_MAX_BATCH_SIZE, Config.VOYAGE_MAX_BATCH_TOKENS)
+    semaphore = asyncio.Semaphore(Config.VOYAGE_MAX_CONCURRENCY)
+    embeddings = None
+
+    async def embed(start: int, end: int):
+        nonlocal embeddings
+        async with semaphore:
+            vectors = await _embed_batch(texts[start:end], model, api_key)
+        if embeddings is None:
+            embeddings = np.empty((len(texts), len(vectors[0])), dtype=np.float32)
+        embeddings[start:end] = vectors
+
+    await asyncio.gather(*(embed(start, end) for start, end in batches))
+    if embeddings is None:
+        return np.empty((0, 0), dtype=np.float32)
+    return embeddings
+
+
+# Set once the deployment rejects json_schema, so later calls go straight to json_object
+_json_schema_rejected = False
+
+
+def json_response_format(name: str, schema: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    response_format for a JSON producing prompt according to Config.LLM_JSON_MODE:
+    a strict JSON schema, plain JSON mode, or None for deployments without either
+    """
+    if Config.LLM_JSON_MODE == "json_schema" and not _json_schema_rejected:
+        return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+    if Config.LLM_JSON_MODE in ("json_schema", "json_object"):
+        return {"type": "json_object"}
+    return None
+
 
 class AIClient:
     def __init__(self):
         self.config = Config
-        self.azure_client = self._initialize_azure_client()
+        self._azure_clients = weakref.WeakKeyDictionary()
+        self.cache = CompletionCache.from_config()
         self.voyage_api_key = self.config.VOYAGE_API_KEY
-        self.voyage_base_url = "https://api.voyageai.com/v1"
+        self.voyage_base_url = VOYAGE_BASE_URL
 
     def _initialize_azure_client(self):
         """Initialize Azure OpenAI client"""
@@ -20,12 +345,24 @@ class AIClient:
                 azure_endpoint=self.config.AZURE_OPENAI_ENDPOINT,
                 api_key=self.config.AZURE_OPENAI_API_KEY,
                 api_version=self.config.AZURE_OPENAI_API_VERSION,
-                http_client=httpx.AsyncClient()
+                http_client=get_async_client(),
+                # Retries are scheduled by AZURE_LIMITER so they respect the shared quota
+                max_retries=0
             )
         except Exception as e:
             logging.error(f"Failed to initialize Azure OpenAI client: {e}")
             raise
 
+    @property
+    def azure_client(self) -> AsyncAzureOpenAI:
+        """Azure OpenAI client bound to the pooled HTTP client of the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._azure_clients.get(loop)
+        if client is None:
+            client = self._initialize_azure_client()
+            self._azure_clients[loop] = client
+        return client
+
     @staticmethod
     def get_embedding_model():
         """Get Voyage embedding model for BERTopic"""
@@ -36,85 +373,114 @@ class AIClient:
             logging.error(f"Failed to load Voyage embedding model: {e}")
             raise
 
-    async def get_completion(self, prompt: str, model: str = None) -> str:
+    async def get_completion(self, prompt: str, model: str = None, use_cache: bool = True,
+                             response_format: Optional[Dict[str, Any]] = None) -> str:
         """
         Get completion from Azure OpenAI
         :param prompt: The prompt text
         :param model: Optional model override (defaults to config)
+        :param use_cache: Set to False to skip the cache lookup; the fresh completion still replaces the cached one
+        :param response_format: Optional structured output mode, e.g. {"type": "json_object"}
         :return: Completion text
         """
         try:
             model = model or self.config.AZURE_OPENAI_DEPLOYMENT_NAME
-            response = await self.azure_client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}]
+            cache = self.cache
+            # The same prompt under a different output mode is a different completion
+            cache_key = prompt if response_format is None else f"{prompt}\x00{json.dumps(response_format, sort_keys=True)}"
+            extra = {} if response_format is None else {"response_format": response_format}
+            if cache and use_cache:
+                try:
+                    cached = await asyncio.to_thread(cache.get, model, cache_key)
+                    if cached is not None:
+                        return cached
+                except Exception as e:
+                    logging.warning(f"Completion cache lookup failed: {e}")
+            estimated_tokens = estimate_tokens(prompt) + self.config.LLM_EXPECTED_OUTPUT_TOKENS
+            response = await AZURE_LIMITER.run(
+                lambda: self.azure_client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    **extra
+                ),
+                tokens=estimated_tokens
             )
-            return response.choices[0].message.content
+            if response.usage is not None:
+                AZURE_LIMITER.record_usage(estimated_tokens, response.usage.total_tokens)
+            content = response.choices[0].message.content
+            if cache and content is not None:
+                try:
+                    await asyncio.to_thread(cache.put, model, cache_key, content)
+                except Exception as e:
+                    logging.warning(f"Completion cache write failed: {e}")
+            return content
+        except BadRequestError as e:
+            if (response_format or {}).get("type") != "json_schema" or "response_format" not in str(e):
+                logging.error(f"Error getting completion: {e}")
+                raise
+            global _json_schema_rejected
+            if not _json_schema_rejected:
+                logging.warning(f"Deployment rejected json_schema output, using json_object instead: {e}")
+                _json_schema_rejected = True
+            return await self.get_completion(prompt, model, use_cache, {"type": "json_object"})
         except Exception as e:
             logging.error(f"Error getting completion: {e}")
             raise
 
-    async def get_embedding(self, texts: List[str], model: str = "voyage-3-large") -> List[List[float]]:
+    async def get_completions_many(self, prompts: List[str], model: str = None,
+                                   max_concurrency: Optional[int] = None,
+                                   use_cache: Union[bool, List[bool]] = True,
+                                   response_format: Optional[Dict[str, Any]] = None) -> List[Union[str, Exception]]:
+        """
+        Get completions for many prompts concurrently on a single event loop
+        :param prompts: The prompt texts
+        :param model: Optional model override (defaults to config)
+        :param max_concurrency: Maximum number of in-flight requests (defaults to config)
+        :param use_cache: False (or a per-prompt list of flags) to skip the cache lookup and overwrite the entry
+        :param response_format: Optional structured output mode applied to every prompt
+        :return: Completion text or the raised exception for each prompt, in input order
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.config.LLM_MAX_CONCURRENCY)
+        if isinstance(use_cache, bool):
+            use_cache = [use_cache] * len(prompts)
+
+        async def complete(prompt: str, cached: bool) -> str:
+            async with semaphore:
+                return await self.get_completion(prompt, model, cached, response_format)
+
+        results = await asyncio.gather(
+            *(complete(prompt, cached) for prompt, cached in zip(prompts, use_cache)),
+            return_exceptions=True
+        )
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        if failed:
+            logging.warning(f"{failed} of {len(prompts)} completions failed")
+        if self.cache and any(use_cache):
+            logging.info(f"Completion cache stats: {self.cache.stats()}")
+        return results
+
+    async def get_embedding(self, texts: List[str], model: str = "voyage-3-large") -> np.ndarray:
         """
         Get embeddings from Voyage AI
         :param texts: List of texts to embed
         :param model: Voyage model name
-        :return: List of embedding vectors
+        :return: Matrix of embedding vectors, one row per text
         """
         try:
-            headers = {
-                "Authorization": f"Bearer {self.voyage_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "input": texts,
-                "model": model
-            }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.voyage_base_url}/embeddings",
-                    headers=headers,
-                    json=data,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                result = response.json()
-                return [embedding["embedding"] for embedding in result["data"]]
-                
+            return await embed_texts(texts, model, self.voyage_api_key)
         except Exception as e:
             logging.error(f"Error getting embeddings from Voyage AI: {e}")
             raise
 
-    def get_embedding_sync(self, texts: List[str], model: str = "voyage-3-large") -> List[List[float]]:
+    def get_embedding_sync(self, texts: List[str], model: str = "voyage-3-large") -> np.ndarray:
         """
         Get embeddings from Voyage AI synchronously
         :param texts: List of texts to embed
         :param model: Voyage model name
-        :return: List of embedding vectors
+        :return: Matrix of embedding vectors, one row per text
         """
         try:
-            headers = {
-                "Authorization": f"Bearer {self.voyage_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "input": texts,
-                "model": model
-            }
-            
-            response = requests.post(
-                f"{self.voyage_base_url}/embeddings",
-                headers=headers,
-                json=data,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            result = response.json()
-            return [embedding["embedding"] for embedding in result["data"]]
-                
+            return embed_texts_sync(texts, model, self.voyage_api_key)
         except Exception as e:
             logging.error(f"Error getting embeddings from Voyage AI: {e}")
             raise
@@ -126,8 +492,11 @@ class VoyageEmbeddingModel:
     def __init__(self):
         # Avoid circular import by accessing config directly
         self.voyage_api_key = Config.VOYAGE_API_KEY
-        self.voyage_base_url = "https://api.voyageai.com/v1"
+        self.voyage_base_url = VOYAGE_BASE_URL
         self.model_name = "voyage-3-large"
+        # Default output dimension of voyage-3-large, for shaping empty results
+        self.dimension = 1024
+        self.cache = EmbeddingCache.from_config()
     
     def encode(self, texts: Union[str, List[str]], **kwargs) -> np.ndarray:
         """
@@ -138,39 +507,56 @@ class VoyageEmbeddingModel:
             # Convert to list if single string
             if isinstance(texts, str):
                 texts = [texts]
+            if not texts:
+                return np.empty((0, self.dimension), dtype=np.float32)
             
             # Always use synchronous approach for BERTopic compatibility
-            return self._encode_sync(texts)
+            if self.cache is None:
+                return self._encode_sync(texts)
+            return self._encode_cached(texts)
                 
         except Exception as e:
             logging.error(f"Error in Voyage embedding encode: {e}")
             raise
 
+    def _encode_cached(self, texts: List[str]) -> np.ndarray:
+        """Embed only the texts missing from the cache and assemble the full matrix in place"""
+        keys = [EmbeddingCache.make_key(text) for text in texts]
+        unique_keys = list(dict.fromkeys(keys))
+        try:
+            cached = self.cache.get_many(self.model_name, unique_keys)
+        except Exception as e:
+            logging.warning(f"Embedding cache lookup failed, embedding everything: {e}")
+            cached = {}
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        missing_keys = list(missing)
+        fresh = self._encode_sync(list(missing.values())) if missing else None
+        fresh_rows = {key: row for row, key in enumerate(missing_keys)}
+        logging.info(f"Embedding cache: {len(cached)} hits, {len(missing)} misses")
+
+        if fresh is not None:
+            dim = fresh.shape[1]
+        else:
+            dim = len(next(iter(cached.values()))) // self.cache.dtype.itemsize
+        embeddings = np.empty((len(texts), dim), dtype=np.float32)
+        for row, key in enumerate(keys):
+            if key in cached:
+                embeddings[row] = np.frombuffer(cached[key], dtype=self.cache.dtype)
+            else:
+                embeddings[row] = fresh[fresh_rows[key]]
+
+        if fresh is not None:
+            try:
+                self.cache.put_many(self.model_name, missing_keys, fresh)
+            except Exception as e:
+                logging.warning(f"Embedding cache write failed: {e}")
+        return embeddings
+
     def _encode_sync(self, texts: List[str]) -> np.ndarray:
-        """Synchronous encoding using requests"""
+        """Synchronous encoding in limit-aware parallel batches"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.voyage_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "input": texts,
-                "model": self.model_name
-            }
-            
-            response = requests.post(
-                f"{self.voyage_base_url}/embeddings",
-                headers=headers,
-                json=data,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            result = response.json()
-            embeddings = [embedding["embedding"] for embedding in result["data"]]
-            
-            return np.array(embeddings)
-            
+            return embed_texts_sync(texts, self.model_name, self.voyage_api_key)
         except Exception as e:
             logging.error(f"Error in synchronous Voyage embedding: {e}")
-            raise 
\ No newline at end of file
+            raise
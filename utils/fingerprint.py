@@ -0,0 +1,23 @@
+import hashlib
+from urllib.parse import urlsplit, urlunsplit
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL so that trivially different links to the same page compare equal"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, "", ""))
+
+
+def content_fingerprint(url: str, content: str) -> str:
+    """Identity of an item's source content: normalized URL plus a hash of the raw snippet"""
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{normalize_url(url)}\x00{content_hash}".encode("utf-8")).hexdigest()
+
+
+def text_hash(text: str) -> str:
+    """Hash of a text with whitespace and case normalized, for exact-duplicate checks"""
+    return hashlib.sha256(" ".join(text.split()).casefold().encode("utf-8")).hexdigest()
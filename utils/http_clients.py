@@ -0,0 +1,82 @@
+import asyncio
+import importlib.util
+import logging
+import threading
+import weakref
+from typing import Any, Awaitable
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+
+# One pooled session for all synchronous calls, and one async client per event loop.
+# httpx connections are bound to the loop that opened them, so every asyncio.run()
+# gets its own client instead of reusing sockets from a closed loop; run_async() closes it
+# before the loop shuts down.
+_sync_session = None
+_sync_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def get_sync_session() -> requests.Session:
+    """Process-wide keep-alive session for the requests based API and crawler calls"""
+    global _sync_session
+    if _sync_session is None:
+        with _sync_lock:
+            if _sync_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=Config.HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=Config.HTTP_MAX_CONNECTIONS
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _sync_session = session
+    return _sync_session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Pooled httpx client for the currently running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=Config.HTTP2_ENABLED and HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=Config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(Config.HTTP_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT)
+        )
+        _async_clients[loop] = client
+        logging.debug(f"Created pooled async HTTP client (http2={Config.HTTP2_ENABLED and HTTP2_AVAILABLE})")
+    return client
+
+
+def close_sync_session():
+    """Close the shared session, e.g. at the end of a pipeline run"""
+    global _sync_session
+    with _sync_lock:
+        if _sync_session is not None:
+            _sync_session.close()
+            _sync_session = None
+
+
+async def close_async_client():
+    """Close the running loop's pooled client, if one was created"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def run_async(coro: Awaitable[Any]) -> Any:
+    """asyncio.run() for pipeline code: the loop's pooled HTTP client is closed before the loop is"""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await close_async_client()
+    return asyncio.run(main())
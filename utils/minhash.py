@@ -0,0 +1,92 @@
+import functools
+import hashlib
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Set
+import numpy as np
+from config import Config
+
+# Universal hashing (a * x + b) mod p over 32-bit shingle hashes, as in the standard MinHash construction
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+TOKEN = re.compile(r"\w+")
+# Shingles hashed per block, bounding the (shingles x permutations) matrix for long READMEs
+BLOCK_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=None)
+def _permutations(num_perm: int):
+    # Fixed seed: signatures are persisted and must stay comparable across runs
+    rng = np.random.RandomState(1)
+    a = rng.randint(1, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def shingle_hashes(tokens: List[str], size: int) -> np.ndarray:
+    """32-bit hashes of the distinct word size-grams of a token list"""
+    if len(tokens) < size:
+        grams = {" ".join(tokens)} if tokens else set()
+    else:
+        grams = {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """
+    MinHash signature of a text: Config.MINHASH_NUM_PERM uint32 minima. None for texts with fewer
+    than Config.MINHASH_MIN_TOKENS words, whose empty or tiny shingle sets would all look identical.
+    """
+    tokens = TOKEN.findall((text or "").lower())
+    if len(tokens) < max(Config.MINHASH_MIN_TOKENS, 1):
+        return None
+    a, b = _permutations(Config.MINHASH_NUM_PERM)
+    minima = np.full(Config.MINHASH_NUM_PERM, MAX_HASH, dtype=np.uint64)
+    hashes = shingle_hashes(tokens, Config.MINHASH_SHINGLE_SIZE)
+    for start in range(0, len(hashes), BLOCK_SIZE):
+        block = hashes[start:start + BLOCK_SIZE, None]
+        # uint64 products wrap around, which keeps the hash family universal enough for MinHash
+        values = ((block * a + b) % MERSENNE_PRIME) & MAX_HASH
+        np.minimum(minima, values.min(axis=0), out=minima)
+    return minima.astype(np.uint32)
+
+
+def from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.uint32)
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the two shingle sets"""
+    return float(np.mean(first == second))
+
+
+def band_keys(sig: np.ndarray) -> List[str]:
+    """One bucket key per LSH band; texts sharing any key are near-duplicate candidates"""
+    rows = len(sig) // Config.MINHASH_BANDS
+    return [
+        hashlib.blake2b(bytes([band]) + sig[band * rows:(band + 1) * rows].tobytes(), digest_size=16).hexdigest()
+        for band in range(Config.MINHASH_BANDS)
+    ]
+
+
+class LSHIndex:
+    """In-memory band index over a set of signatures"""
+
+    def __init__(self):
+        self.buckets: Dict[str, Set[Hashable]] = defaultdict(set)
+        self.signatures: Dict[Hashable, np.ndarray] = {}
+
+    def add(self, key: Hashable, sig: np.ndarray, keys: List[str] = None):
+        self.signatures[key] = sig
+        for band_key in keys or band_keys(sig):
+            self.buckets[band_key].add(key)
+
+    def query(self, sig: np.ndarray, keys: List[str] = None, threshold: float = None) -> List[Hashable]:
+        """Indexed keys whose estimated similarity to sig is at least the threshold, most similar first"""
+        threshold = Config.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+        candidates = set()
+        for band_key in keys or band_keys(sig):
+            candidates |= self.buckets.get(band_key, set())
+        scored = [(similarity(sig, self.signatures[key]), key) for key in candidates]
+        return [key for score, key in sorted(scored, key=lambda pair: -pair[0]) if score >= threshold]
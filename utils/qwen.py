@@ -1,63 +1,175 @@
-import os, gc, torch
-from datasets import load_dataset
-from transformers import AutoModelForCausalLM, AutoTokenizer, AutoModel
+import os, sys, time, logging, threading
+from typing import List
 import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM, AutoModel, BitsAndBytesConfig
-import torch
-import torch.nn.functional as F
-from peft import PeftModel
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from utils.token_budget import truncate_to_tokens
 
-os.environ['CUDA_VISIBLE_DEVICES'] = '0,1'
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '0,1')
 
+lora_model_path = "model/qwen_lora_summary_model"
+INT8_WEIGHTS_FILE = "model_int8.pt"
 
+system_prompt = '''Extract the most important phrases and key entities from the following social media post about technology.Your summary should be in english. Your summary should use only exact phrases and sentences from the original post, preserving the original wording.  Focus on capturing the main topics, technologies, products, companies, and any significant facts or statistics mentioned. Present the summary as a concise list of bullet points or a short paragraph, ensuring that only the most relevant information is included. Output format: One single paragraph 2-3 sentences, no line breaks, no special characters or bullet points.
+Text to summarize:'''
 
-# Cấu hình quantization 8-bit
-quantization_config = BitsAndBytesConfig(
-    load_in_4bit=True,
-    bnb_4bit_use_double_quant=False,
-    bnb_4bit_quant_type="nf4",
-    bnb_4bit_compute_dtype=torch.bfloat16
-)
 
-model_name = "Qwen/Qwen3"
-device = 'cuda'
+class QwenEngine:
+    """Tokenizer and merged model, loaded on first use instead of at import time"""
 
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForCausalLM.from_pretrained(
-    model_name,
-    torch_dtype="auto",
-    quantization_config=quantization_config,
-    device_map=device
-)
-# 2. Tải adapter LoRA
-lora_model_path = "model/qwen_lora_summary_model"
-lora_model = PeftModel.from_pretrained(model, lora_model_path)
+    def __init__(self):
+        self.device = Config.QWEN_DEVICE or ('cuda' if torch.cuda.is_available() else 'cpu')
+        if self.device == 'cpu' and Config.QWEN_NUM_THREADS:
+            torch.set_num_threads(Config.QWEN_NUM_THREADS)
+        started = time.perf_counter()
+        self.tokenizer = self._load_tokenizer()
+        self.model = self._load_model()
+        self.model.eval()
+        # Stop at end of turn as well as end of text
+        self.stop_token_ids = list({self.tokenizer.eos_token_id, self.tokenizer.convert_tokens_to_ids('<|im_end|>')} - {None})
+        logging.info(f"Qwen model ready on {self.device} in {time.perf_counter() - started:.1f}s")
 
-# 3. Hợp nhất mô hình (merge)
-# Hợp nhất các trọng số LoRA vào mô hình cơ sở
-merged_model = lora_model.merge_and_unload()
+    def _load_tokenizer(self):
+        from transformers import AutoTokenizer
+        merged_path = Config.QWEN_MERGED_MODEL_PATH
+        source = merged_path if os.path.isdir(merged_path) else Config.QWEN_BASE_MODEL
+        tokenizer = AutoTokenizer.from_pretrained(source)
+        # Decoder-only models must be left padded so every prompt in a batch ends at the same position
+        tokenizer.padding_side = 'left'
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        return tokenizer
 
+    def _load_model(self):
+        from transformers import AutoModelForCausalLM
+        merged_path = Config.QWEN_MERGED_MODEL_PATH
+        int8_path = os.path.join(merged_path, INT8_WEIGHTS_FILE)
 
-system_prompt = '''Extract the most important phrases and key entities from the following social media post about technology.Your summary should be in english. Your summary should use only exact phrases and sentences from the original post, preserving the original wording.  Focus on capturing the main topics, technologies, products, companies, and any significant facts or statistics mentioned. Present the summary as a concise list of bullet points or a short paragraph, ensuring that only the most relevant information is included. Output format: One single paragraph 2-3 sentences, no line breaks, no special characters or bullet points.
-Text to summarize:'''
+        if self.device == 'cpu' and os.path.exists(int8_path):
+            # The whole quantized module is pickled; mmap keeps its plain tensors out of RAM until touched
+            model = torch.load(int8_path, mmap=True, weights_only=False)
+            logging.info(f"Loaded int8 Qwen model from {int8_path}")
+            return model
 
+        if os.path.isdir(merged_path) and os.path.exists(os.path.join(merged_path, "config.json")):
+            # safetensors checkpoints are memory-mapped, so this avoids a second copy of the weights
+            model = AutoModelForCausalLM.from_pretrained(
+                merged_path,
+                torch_dtype=torch.bfloat16,
+                low_cpu_mem_usage=True,
+                device_map=self.device
+            )
+            logging.info(f"Loaded merged Qwen model from {merged_path}")
+            return model
 
-def get_qwen_output(text):
+        logging.warning(f"No merged model at {merged_path}; merging the LoRA adapter now. Run scripts/export_qwen.py once to skip this.")
+        return merge_lora(self.device)
+
+
+def merge_lora(device: str):
+    """Load the base model, attach the LoRA adapter and merge it into the base weights"""
+    from transformers import AutoModelForCausalLM, BitsAndBytesConfig
+    from peft import PeftModel
+    if device == 'cuda':
+        # Cấu hình quantization 4-bit (bitsandbytes chỉ hỗ trợ GPU)
+        quantization_config = BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_use_double_quant=False,
+            bnb_4bit_quant_type="nf4",
+            bnb_4bit_compute_dtype=torch.bfloat16
+        )
+        model = AutoModelForCausalLM.from_pretrained(
+            Config.QWEN_BASE_MODEL,
+            torch_dtype="auto",
+            quantization_config=quantization_config,
+            device_map=device
+        )
+    else:
+        model = AutoModelForCausalLM.from_pretrained(
+            Config.QWEN_BASE_MODEL,
+            torch_dtype=torch.bfloat16,
+            low_cpu_mem_usage=True
+        )
+    # Tải adapter LoRA và hợp nhất các trọng số LoRA vào mô hình cơ sở
+    lora_model = PeftModel.from_pretrained(model, lora_model_path)
+    return lora_model.merge_and_unload()
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of the Linear layers for CPU inference"""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> QwenEngine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = QwenEngine()
+    return _engine
+
+
+def build_prompt(tokenizer, text: str) -> str:
     messages = [
         {"role": "system", "content": system_prompt},
-        {"role": "user", "content": f"###User input text here###\n{text}"}
+        {"role": "user", "content": f"###User input text here###\n{truncate_to_tokens(text, Config.QWEN_MAX_INPUT_TOKENS)}"}
     ]
-    text = tokenizer.apply_chat_template(
+    return tokenizer.apply_chat_template(
         messages,
         tokenize=False,
         add_generation_prompt=False,
         enable_thinking=False # Switches between thinking and non-thinking modes. Default is True.
     )
-    model_inputs = tokenizer([text], return_tensors="pt").to(model.device)
-    generated_ids = merged_model.generate(
-        **model_inputs,
-        max_new_tokens=32768
+
+
+def get_qwen_outputs(texts: List[str], batch_size: int = None, max_new_tokens: int = None) -> List[str]:
+    """
+    Generate outputs for many posts with padded batched generation
+    :param texts: Post texts
+    :param batch_size: Posts per generate call (defaults to config)
+    :param max_new_tokens: Output token budget per post (defaults to config)
+    :return: One output per post, in input order
+    """
+    if not texts:
+        return []
+    engine = get_engine()
+    tokenizer, model = engine.tokenizer, engine.model
+    batch_size = batch_size or Config.QWEN_BATCH_SIZE
+    max_new_tokens = max_new_tokens or Config.QWEN_MAX_NEW_TOKENS
+    prompts = [build_prompt(tokenizer, text) for text in texts]
+    # Batch posts of similar length together to minimise padding
+    order = sorted(range(len(prompts)), key=lambda i: len(prompts[i]))
+    outputs = [None] * len(prompts)
+
+    generated_tokens = 0
+    started = time.perf_counter()
+    for start in range(0, len(order), batch_size):
+        indices = order[start:start + batch_size]
+        model_inputs = tokenizer([prompts[i] for i in indices], return_tensors="pt", padding=True).to(model.device)
+        with torch.inference_mode():
+            generated_ids = model.generate(
+                **model_inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                eos_token_id=engine.stop_token_ids,
+                pad_token_id=tokenizer.pad_token_id
+            )
+        new_ids = generated_ids[:, model_inputs.input_ids.shape[1]:]
+        generated_tokens += int((new_ids != tokenizer.pad_token_id).sum())
+        for i, output_ids in zip(indices, new_ids):
+            outputs[i] = tokenizer.decode(output_ids, skip_special_tokens=True).split('</think>')[-1].strip()
+
+    elapsed = time.perf_counter() - started
+    logging.info(
+        f"Qwen generated {generated_tokens} tokens for {len(texts)} posts in {elapsed:.1f}s "
+        f"({generated_tokens / max(elapsed, 1e-9):.1f} tokens/s on {engine.device})"
     )
-    output_ids = generated_ids[0][len(model_inputs.input_ids[0]):].tolist()
-    final_output = tokenizer.decode(output_ids, skip_special_tokens=True).split('</think>')[-1].strip()
-    return final_output
\ No newline at end of file
+    return outputs
+
+
+def get_qwen_output(text):
+    return get_qwen_outputs([text])[0]
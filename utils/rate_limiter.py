@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional
+import httpx
+import openai
+import requests
+from config import Config
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Waiting is done by sleeping rather than on asyncio primitives so that one limiter can be
+# shared by every event loop created with asyncio.run() and by the embedding worker threads.
+POLL_INTERVAL = 0.05
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None and getattr(error, "response", None) is not None:
+        status = getattr(error.response, "status_code", None)
+    return status
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, from retry-after(-ms) headers when present"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def is_throttled(error: Exception) -> bool:
+    return _status_code(error) == 429
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.APIConnectionError, httpx.TransportError,
+                          requests.ConnectionError, requests.Timeout)):
+        return True
+    return _status_code(error) in RETRYABLE_STATUS_CODES
+
+
+class TokenBucket:
+    """Continuously refilled bucket holding at most one minute of budget"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+
+class AdaptiveLimiter:
+    """
+    Client-side limiter for one API: request and token buckets sized to the quota, an AIMD
+    concurrency window that halves on 429 and grows back on success, and a retry scheduler
+    with jittered exponential backoff bounded by a per-call deadline.
+    """
+
+    def __init__(self, name: str, requests_per_minute: int, tokens_per_minute: int,
+                 max_concurrency: int, min_concurrency: int = 1):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.retried = 0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take a slot and budget, or return how long to wait before trying again"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.in_flight >= int(self.concurrency):
+                return POLL_INTERVAL
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if wait > 0:
+                return wait
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+            return 0.0
+
+    def _release(self):
+        """Return the slot; runs for every acquired slot, including calls that were cancelled"""
+        with self._lock:
+            self.in_flight -= 1
+
+    def _record(self, error: Optional[Exception] = None):
+        """Adjust the AIMD window for a call that completed or failed"""
+        with self._lock:
+            if error is None:
+                # Additive increase: roughly one extra slot per window of successful calls
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+            elif is_throttled(error):
+                self.throttled += 1
+                self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+                pause = retry_after(error)
+                if pause:
+                    self.paused_until = max(self.paused_until, time.monotonic() + pause)
+                logging.warning(f"{self.name} throttled, concurrency window now {int(self.concurrency)}")
+
+    def record_usage(self, estimated: int, actual: int):
+        """Correct the token bucket once the real usage of a call is known"""
+        with self._lock:
+            self.tokens.level -= actual - estimated
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = Config.RETRY_BASE_DELAY * (2 ** attempt) * (0.5 + random.random())
+        return min(Config.RETRY_MAX_DELAY, max(delay, retry_after(error) or 0.0))
+
+    def _give_up(self, attempt: int, error: Exception, delay: float, deadline: float) -> bool:
+        return (attempt + 1 >= Config.RETRY_MAX_ATTEMPTS or not is_retryable(error)
+                or time.monotonic() + delay > deadline)
+
+    async def run(self, call: Callable[[], Awaitable[Any]], tokens: int = 1,
+                  deadline: Optional[float] = None) -> Any:
+        """Await call() within the limits, retrying transient failures until the deadline"""
+        deadline = time.monotonic() + (deadline or Config.RETRY_DEADLINE)
+        attempt = 0
+        while True:
+            while (wait := self._try_acquire(tokens)) > 0:
+                if time.monotonic() + wait > deadline:
+                    raise TimeoutError(f"{self.name} call could not be scheduled before its deadline")
+                await asyncio.sleep(wait)
+            error = None
+            try:
+                result = await call()
+            except Exception as e:
+                error = e
+            finally:
+                # Cancellation is a BaseException and skips the except clause, but must still free the slot
+                self._release()
+            self._record(error)
+            if error is None:
+                return result
+            delay = self._backoff(attempt, error)
+            if self._give_up(attempt, error, delay, deadline):
+                raise error
+            self.retried += 1
+            logging.warning(f"{self.name} call failed ({error}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def run_sync(self, call: Callable[[], Any], tokens: int = 1, deadline: Optional[float] = None) -> Any:
+        """Blocking counterpart of run for thread based callers"""
+        deadline = time.monotonic() + (deadline or Config.RETRY_DEADLINE)
+        attempt = 0
+        while True:
+            while (wait := self._try_acquire(tokens)) > 0:
+                if time.monotonic() + wait > deadline:
+                    raise TimeoutError(f"{self.name} call could not be scheduled before its deadline")
+                time.sleep(wait)
+            error = None
+            try:
+                result = call()
+            except Exception as e:
+                error = e
+            finally:
+                # Cancellation is a BaseException and skips the except clause, but must still free the slot
+                self._release()
+            self._record(error)
+            if error is None:
+                return result
+            delay = self._backoff(attempt, error)
+            if self._give_up(attempt, error, delay, deadline):
+                raise error
+            self.retried += 1
+            logging.warning(f"{self.name} call failed ({error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from config import Config
+from utils.ai_client import VoyageEmbeddingModel
+from utils.token_budget import budget_text
+
+
+class TagClassifier:
+    """
+    Picks tags from Config.ai_tags by cosine similarity between a text embedding and
+    precomputed tag embeddings. Texts whose best score is below the confidence threshold
+    get None so the caller can fall back to the LLM tagger. The threshold comes from the
+    calibration file written by scripts/calibrate_tag_classifier.py, else from Config.
+    """
+
+    def __init__(self, embedding_model: Optional[VoyageEmbeddingModel] = None):
+        self.embedding_model = embedding_model or VoyageEmbeddingModel()
+        self.tags = list(dict.fromkeys(Config.ai_tags))
+        calibration = load_calibration(self.embedding_model.model_name)
+        self.min_score = calibration["min_score"] if calibration else Config.TAG_CLASSIFIER_MIN_SCORE
+        self.margin = Config.TAG_CLASSIFIER_MARGIN
+        self.top_k = Config.MAX_TAGS
+        self._tag_matrix = None
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.maximum(norms, 1e-12, out=norms)
+        matrix /= norms
+        return matrix
+
+    @property
+    def tag_matrix(self) -> np.ndarray:
+        """Unit-norm tag embeddings, computed once (and served from the embedding cache afterwards)"""
+        if self._tag_matrix is None:
+            descriptions = [f"AI topic: {tag.replace('-', ' ')}" for tag in self.tags]
+            self._tag_matrix = self._normalize(np.asarray(self.embedding_model.encode(descriptions), dtype=np.float32))
+        return self._tag_matrix
+
+    def top_tags(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices into self.tags and cosine scores of the top_k tags per text, best first"""
+        embeddings = np.asarray(
+            self.embedding_model.encode([budget_text(text, "tagging") for text in texts]),
+            dtype=np.float32
+        )
+        scores = self._normalize(embeddings) @ self.tag_matrix.T
+
+        k = min(self.top_k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return top, top_scores
+
+    def classify(self, texts: List[str]) -> List[Optional[List[str]]]:
+        """Return up to top_k uppercase tags per text, or None when the text is low confidence"""
+        if not texts:
+            return []
+        top, top_scores = self.top_tags(texts)
+
+        results = []
+        for indices, row_scores in zip(top, top_scores):
+            if row_scores[0] < self.min_score:
+                results.append(None)
+                continue
+            # Keep tags close to the best match, so one strong topic does not drag in weak ones
+            cutoff = max(self.min_score, row_scores[0] - self.margin)
+            results.append([self.tags[i].upper() for i, score in zip(indices, row_scores) if score >= cutoff])
+        confident = sum(result is not None for result in results)
+        logging.info(f"Local tag classifier handled {confident} of {len(texts)} texts")
+        return results
+
+
+def calibrate_threshold(scores: Sequence[float], correct: Sequence[bool], target_precision: float) -> Optional[float]:
+    """
+    Lowest top-tag score at which the items scoring at least that much still reach the target
+    precision (share whose top tag the reference tagger agrees with), or None if no cutoff does.
+    """
+    order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+    sorted_scores = np.asarray(scores, dtype=np.float64)[order]
+    hits = np.cumsum(np.asarray(correct, dtype=np.float64)[order])
+    precision = hits / np.arange(1, len(order) + 1)
+    # Only cut between distinct scores; tied items fall on the same side of the threshold
+    last_of_tie = np.append(sorted_scores[1:] != sorted_scores[:-1], True)
+    passing = np.flatnonzero((precision >= target_precision) & last_of_tie)
+    if not len(passing):
+        return None
+    return float(sorted_scores[passing[-1]])
+
+
+def load_calibration(model_name: str) -> Optional[Dict[str, Any]]:
+    """The persisted calibration for this embedding model, if one has been run"""
+    path = Config.TAG_CLASSIFIER_CALIBRATION_PATH
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            calibration = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable tag classifier calibration {path}: {e}")
+        return None
+    if calibration.get("model") != model_name:
+        logging.warning(f"Tag classifier calibration {path} is for {calibration.get('model')}, not {model_name}; ignoring it")
+        return None
+    return calibration
+
+
+def save_calibration(calibration: Dict[str, Any]):
+    with open(Config.TAG_CLASSIFIER_CALIBRATION_PATH, "w", encoding="utf-8") as f:
+        json.dump(calibration, f, indent=2)
+
+
+_classifier = None
+
+
+def get_tag_classifier() -> TagClassifier:
+    """Process-wide classifier so tag embeddings are computed at most once per run"""
+    global _classifier
+    if _classifier is None:
+        _classifier = TagClassifier()
+    return _classifier
@@ -0,0 +1,15 @@
+import re
+from typing import Iterable, List, Optional
+
+
+def normalize_tag(tag: str) -> str:
+    """Canonical tag form, so 'LARGE-LANGUAGE-MODELS', '#Large Language Models' and 'large-language-models' are one tag"""
+    return re.sub(r"[\s_]+", "-", tag.strip().lstrip("#").strip().lower())
+
+
+def normalize_tags(tags: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """Normalized tags in first-seen order, without duplicates or empty entries"""
+    if tags is None:
+        return None
+    normalized = (normalize_tag(tag) for tag in tags if isinstance(tag, str))
+    return list(dict.fromkeys(tag for tag in normalized if tag))
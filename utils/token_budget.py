@@ -0,0 +1,110 @@
+import re
+from typing import List
+from config import Config
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # the encoding file is downloaded on first use; offline, fall back to a character estimate
+    _encoding = None
+
+# README sections that carry no news value. Headings such as "Building", "Support" or
+# "Development" often describe what the project does, so only setup and meta sections are dropped.
+BOILERPLATE_SECTIONS = re.compile(
+    r"^(installation|install|installing|setup|getting started|requirements|prerequisites|"
+    r"license|licence|contributing|contributors|contribution|citation|cite|citing|"
+    r"acknowledg(e)?ments?|star history|stargazers|sponsors?|contact|faq|"
+    r"table of contents|changelog|todo)\b",
+    re.IGNORECASE
+)
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+BADGE = re.compile(r"\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)|!\[[^\]]*\]\([^)]*(shields\.io|badge|badgen)[^)]*\)")
+IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+HTML_TAG = re.compile(r"<[^>]+>")
+INSTALL_COMMAND = re.compile(r"^\s*(\$\s*)?(pip3?|npm|yarn|pnpm|conda|brew|apt(-get)?|git clone|docker|curl|wget|cargo|go get|uv)\b")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // Config.CHARS_PER_TOKEN + 1
+
+
+def strip_markdown_boilerplate(text: str) -> str:
+    """Drop badges, images, HTML, code blocks of install commands and boilerplate sections from a README"""
+    lines = []
+    skip_level = None
+    in_fence = False
+    fence = []
+    fence_open = "```"
+    for line in text.splitlines():
+        if line.strip().startswith("```"):
+            if in_fence:
+                in_fence = False
+                # Keep code blocks unless they are just install/setup commands
+                body = [l for l in fence if l.strip()]
+                if skip_level is None and body and not all(INSTALL_COMMAND.match(l) for l in body):
+                    lines.extend([fence_open, *fence, "```"])
+                fence = []
+            else:
+                in_fence = True
+                fence_open = line.strip()
+            continue
+        if in_fence:
+            fence.append(line)
+            continue
+
+        heading = HEADING.match(line)
+        if heading:
+            level = len(heading.group(1))
+            if skip_level is not None and level > skip_level:
+                continue
+            title = HTML_TAG.sub("", heading.group(2)).strip(" :*_`")
+            skip_level = level if BOILERPLATE_SECTIONS.match(title) else None
+            if skip_level is not None:
+                continue
+        elif skip_level is not None:
+            continue
+
+        lines.append(HTML_TAG.sub("", IMAGE.sub("", BADGE.sub("", line))))
+    stripped = re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+    # Never return nothing: a README that is all boilerplate is still better than an empty prompt
+    return stripped or text
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens, preferring to end on a sentence boundary"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if _encoding is not None:
+        cut = _encoding.decode(_encoding.encode(text, disallowed_special=())[:max_tokens])
+    else:
+        # count_tokens rounds the estimate up, so a full max_tokens * CHARS_PER_TOKEN would count one over
+        cut = text[:max_tokens * Config.CHARS_PER_TOKEN - 1]
+    boundary = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+    if boundary > len(cut) * 0.8:
+        cut = cut[:boundary + 1]
+    return cut.rstrip()
+
+
+def budget_text(text: str, prompt: str) -> str:
+    """Cap text to the input budget of the named prompt in Config.PROMPT_TOKEN_BUDGETS"""
+    return truncate_to_tokens(text, Config.PROMPT_TOKEN_BUDGETS[prompt]) if text else text
+
+
+def split_into_chunks(text: str, chunk_tokens: int) -> List[str]:
+    """Greedily pack whole sentences into chunks of roughly chunk_tokens tokens"""
+    chunks, current, current_tokens = [], [], 0
+    for sentence in SENTENCE_END.split(text):
+        sentence_tokens = count_tokens(sentence)
+        if current and current_tokens + sentence_tokens > chunk_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(truncate_to_tokens(sentence, chunk_tokens))
+        current_tokens += min(sentence_tokens, chunk_tokens)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
@@ -0,0 +1,87 @@
+from typing import List, Optional, Tuple
+import numpy as np
+
+# Rows per block: bounds the (queries x rows) score matrix and lets new rows be appended without copying
+BLOCK_ROWS = 4096
+
+
+class VectorIndex:
+    """
+    Exact cosine-similarity index over unit-normalized float32 vectors, stored in fixed-size blocks.
+    Searches are one matrix product per block; additions fill the last block; expiry rebuilds blocks.
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim
+        self.blocks: List[np.ndarray] = []
+        self.sizes: List[int] = []
+        self.keys: List[str] = []
+        self.times = np.empty(0, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @staticmethod
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.maximum(norms, 1e-12, out=norms)
+        return vectors / norms
+
+    def add(self, keys: List[str], vectors: np.ndarray, times: List[float]):
+        """Append vectors with their keys and POSIX timestamps"""
+        if not keys:
+            return
+        vectors = self.normalize(vectors)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        start = 0
+        while start < len(vectors):
+            if not self.blocks or self.sizes[-1] == BLOCK_ROWS:
+                self.blocks.append(np.empty((BLOCK_ROWS, self.dim), dtype=np.float32))
+                self.sizes.append(0)
+            size = self.sizes[-1]
+            take = min(BLOCK_ROWS - size, len(vectors) - start)
+            self.blocks[-1][size:size + take] = vectors[start:start + take]
+            self.sizes[-1] += take
+            start += take
+        self.keys.extend(keys)
+        self.times = np.concatenate([self.times, np.asarray(times, dtype=np.float64)])
+
+    def search(self, queries: np.ndarray) -> Tuple[np.ndarray, List[Optional[str]]]:
+        """Best cosine score and matching key for every query (-inf and None when the index is empty)"""
+        scores, keys = self.search_top_k(queries, 1)
+        return scores[:, 0], [row_keys[0] for row_keys in keys]
+
+    def search_top_k(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, List[List[Optional[str]]]]:
+        """
+        The k best cosine scores per query, best first, with their keys. Rows are padded
+        with -inf and None when the index holds fewer than k entries.
+        """
+        queries = self.normalize(queries)
+        best = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        best_rows = np.full((len(queries), k), -1, dtype=np.int64)
+        offset = 0
+        for block, size in zip(self.blocks, self.sizes):
+            scores = queries @ block[:size].T
+            take = min(k, size)
+            rows = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            # Merge the block's candidates into the running top k
+            merged_scores = np.concatenate([best, np.take_along_axis(scores, rows, axis=1)], axis=1)
+            merged_rows = np.concatenate([best_rows, rows + offset], axis=1)
+            order = np.argsort(-merged_scores, axis=1, kind="stable")[:, :k]
+            best = np.take_along_axis(merged_scores, order, axis=1)
+            best_rows = np.take_along_axis(merged_rows, order, axis=1)
+            offset += size
+        return best, [[self.keys[row] if row >= 0 else None for row in rows] for rows in best_rows]
+
+    def expire(self, cutoff: float):
+        """Drop entries older than the cutoff timestamp"""
+        keep = self.times >= cutoff
+        if keep.all():
+            return
+        vectors = np.concatenate([block[:size] for block, size in zip(self.blocks, self.sizes)])[keep]
+        keys = [key for key, kept in zip(self.keys, keep) if kept]
+        times = self.times[keep]
+        self.blocks, self.sizes, self.keys, self.times = [], [], [], np.empty(0, dtype=np.float64)
+        self.add(keys, vectors, times.tolist())